@@ -13,6 +13,7 @@ from rpg.intro_view import render as render_intro
 from rpg.ficha_view import render as render_ficha
 from rpg.combate_view import render as render_combate
 from rpg.monsters_view import render as render_monsters
+from rpg.music import render_player as render_music
 
 
 def apply_black_red_css() -> None:
@@ -144,6 +145,9 @@ with st.sidebar:
         index=0,
         label_visibility="collapsed",
     )
+    st.divider()
+    # player fica na barra lateral: continua tocando ao trocar de página
+    render_music(default_scene="intro" if page == "📜 Introdução" else None)
 
 if page == "📜 Introdução":
     render_intro()
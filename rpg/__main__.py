@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Comandos de manutenção: python -m rpg <comando>"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from . import storage
+
+
+def _cmd_rebuild_index(args: argparse.Namespace) -> None:
+    counts = storage.rebuild_index()
+    print(
+        f"Índice reconstruído: {counts['characters']} fichas, {counts['monsters']} monstros, "
+        f"{counts['encounters']} encontros."
+    )
+
+
+def _cmd_migrate_portraits(args: argparse.Namespace) -> None:
+    moved = storage.migrate_portraits()
+    print(f"{moved} ficha(s) migradas para data/portraits.")
+
+
+def _cmd_copy_storage(args: argparse.Namespace) -> None:
+    src = storage.make_backend(args.src, Path(args.src_path) if args.src_path else None)
+    dst = storage.make_backend(args.dst, Path(args.dst_path) if args.dst_path else None)
+    counts = storage.copy_storage(src, dst)
+    print(f"{args.src} -> {args.dst}: " + ", ".join(f"{n} {k}" for k, n in counts.items()))
+
+
+def _cmd_build_assets(args: argparse.Namespace) -> None:
+    from .assets import BUILD_DIR, build_assets
+
+    manifest = build_assets(force=args.force)
+    for name, info in manifest["sources"].items():
+        sizes = ", ".join(f"{v['format']}{'@' + str(v['width']) if 'width' in v else ''} {v['bytes'] / 1024:.0f} KB" for v in info["variants"])
+        note = f" ({info['note']})" if info.get("note") else ""
+        print(f"{name} [{info['kind']}] {info['bytes'] / 1024:.0f} KB -> {sizes or 'original'}{note}")
+    print(f"Manifesto em {BUILD_DIR / 'manifest.json'} (reinicie o app para usar).")
+
+
+def _cmd_simulate(args: argparse.Namespace) -> None:
+    from .simulate import simulate_encounter
+
+    ids = args.party.split(",") if args.party else storage.list_character_ids()
+    party = [c for c in (storage.load_character(i) for i in ids) if c]
+    monsters = []
+    for spec in args.monster:
+        mid, _, count = spec.partition(":")
+        m = storage.load_monster(mid)
+        if not m:
+            raise SystemExit(f"Monstro não encontrado: {mid}")
+        monsters.append((m, int(count or 1)))
+    if not party or not monsters:
+        raise SystemExit("Informe ao menos uma ficha e um monstro (--monster ID[:QTD]).")
+
+    r = simulate_encounter(party, monsters, n=args.n, seed=args.seed, max_rounds=args.max_rounds, use_current_hp=args.current_hp)
+    print(f"{r['n']} combates (semente {r['seed']}): " + ", ".join(c.character_name for c in party)
+          + " vs " + ", ".join(f"{m.name} x{k}" for m, k in monsters))
+    print(f"  vitória {r['win_rate']:.1%} • derrota {r['loss_rate']:.1%} • sem fim em {args.max_rounds} rodadas {r['timeout_rate']:.1%}")
+    rd, dn = r["rounds"], r["downed_pcs"]
+    print(f"  rodadas: média {rd['mean']:.1f} (p10 {rd['p10']:.0f} • p50 {rd['p50']:.0f} • p90 {rd['p90']:.0f})")
+    print(f"  PCs caídos: média {dn['mean']:.2f} (p90 {dn['p90']:.0f})")
+    for name, p in r["p_pc_down"].items():
+        print(f"    {name}: cai em {p:.1%}")
+    for label, key in (("dano sofrido pelo grupo", "party_damage_taken"), ("dano causado aos monstros", "monster_damage_taken")):
+        d = r[key]
+        print(f"  {label}: média {d['mean']:.1f} ± {d['std']:.1f} (p10 {d['p10']:.0f} • p50 {d['p50']:.0f} • p90 {d['p90']:.0f})")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m rpg")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("rebuild-index", help="reconstrói data/index.json a partir dos arquivos")
+    p.set_defaults(func=_cmd_rebuild_index)
+
+    p = sub.add_parser("migrate-portraits", help="move fotos base64 das fichas para data/portraits")
+    p.set_defaults(func=_cmd_migrate_portraits)
+
+    p = sub.add_parser("copy-storage", help="importa/exporta tudo entre backends (json <-> sqlite)")
+    p.add_argument("src", choices=["json", "sqlite"])
+    p.add_argument("dst", choices=["json", "sqlite"])
+    p.add_argument("--src-path", default=None, help="pasta data/ ou arquivo .sqlite3 de origem")
+    p.add_argument("--dst-path", default=None, help="pasta data/ ou arquivo .sqlite3 de destino")
+    p.set_defaults(func=_cmd_copy_storage)
+
+    p = sub.add_parser("build-assets", help="gera versões web (WebP/JPEG, vídeo/áudio leves) de assets/")
+    p.add_argument("--force", action="store_true", help="refaz tudo, mesmo o que não mudou")
+    p.set_defaults(func=_cmd_build_assets)
+
+    p = sub.add_parser("simulate", help="Monte Carlo: fichas salvas vs monstros do bestiário")
+    p.add_argument("--party", default="", help="ids das fichas separados por vírgula (padrão: todas)")
+    p.add_argument("--monster", action="append", default=[], metavar="ID[:QTD]", help="monstro e quantidade (repita)")
+    p.add_argument("-n", type=int, default=10_000, help="número de combates simulados")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--max-rounds", type=int, default=30)
+    p.add_argument("--current-hp", action="store_true", help="usa o HP atual das fichas em vez do máximo")
+    p.set_defaults(func=_cmd_simulate)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .media_server import ASSETS_DIR, MEDIA_DIR
+
+BUILD_DIR = MEDIA_DIR / "build"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+VIDEO_EXTS = {".mp4", ".webm", ".mov", ".mkv"}
+AUDIO_EXTS = {".mp3", ".m4a", ".aac", ".ogg", ".opus", ".wav"}
+
+IMAGE_WIDTHS = (1600, 800)
+
+# (nome, args do ffmpeg, extensão)
+VIDEO_RENDITIONS = (
+    ("720p", ["-vf", "scale=-2:'min(720,ih)'", "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+              "-c:a", "aac", "-b:a", "96k", "-movflags", "+faststart"], ".mp4"),
+    ("480p", ["-vf", "scale=-2:'min(480,ih)'", "-c:v", "libx264", "-preset", "veryfast", "-crf", "30",
+              "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart"], ".mp4"),
+)
+AUDIO_RENDITIONS = (
+    ("96k", ["-vn", "-c:a", "aac", "-b:a", "96k", "-movflags", "+faststart"], ".m4a"),
+    ("64k", ["-vn", "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart"], ".m4a"),
+)
+
+# nomes lógicos usados pelas views -> arquivo em assets/ (primeiro que existir)
+ALIASES: Dict[str, List[str]] = {
+    "intro_photo": ["foto1.jpg", "foto1.jpeg", "foto1.png", "foto1.webp"],
+    "intro_video": ["video1.mp4"],
+    "intro_music": ["musica1.mp4"],
+}
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _ffmpeg() -> Optional[str]:
+    return shutil.which("ffmpeg")
+
+
+def _has_video_stream(path: Path) -> bool:
+    # .mp4 pode ser só áudio (ex.: musica1.mp4); sem ffprobe, assume vídeo
+    probe = shutil.which("ffprobe")
+    if not probe:
+        return True
+    r = subprocess.run(
+        [probe, "-v", "error", "-select_streams", "v", "-show_entries", "stream=codec_type", "-of", "csv=p=0", str(path)],
+        capture_output=True,
+        text=True,
+    )
+    return "video" in r.stdout
+
+
+def _kind(path: Path) -> Optional[str]:
+    ext = path.suffix.lower()
+    if ext in IMAGE_EXTS:
+        return "image"
+    if ext in AUDIO_EXTS:
+        return "audio"
+    if ext in VIDEO_EXTS:
+        return "video" if _has_video_stream(path) else "audio"
+    return None
+
+
+def _rel(p: Path) -> str:
+    return p.relative_to(MEDIA_DIR).as_posix()
+
+
+def _build_image(src: Path, digest: str) -> Dict[str, Any]:
+    from PIL import Image  # vem junto com o streamlit
+
+    out: List[Dict[str, Any]] = []
+    with Image.open(src) as im:
+        im = im.convert("RGB")
+        w, h = im.size
+        widths = sorted({min(w, x) for x in IMAGE_WIDTHS}, reverse=True)
+        for width in widths:
+            size = (width, max(1, round(h * width / w)))
+            scaled = im if size == im.size else im.resize(size, Image.LANCZOS)
+            for fmt, ext, opts in (("webp", ".webp", {"quality": 80, "method": 6}), ("jpeg", ".jpg", {"quality": 82, "optimize": True, "progressive": True})):
+                dst = BUILD_DIR / f"{digest[:16]}-{width}w{ext}"
+                if not dst.exists():
+                    tmp = dst.with_name(f".{dst.name}.tmp")
+                    scaled.save(tmp, fmt.upper(), **opts)
+                    os.replace(tmp, dst)
+                out.append({"path": _rel(dst), "format": fmt, "width": width, "bytes": dst.stat().st_size})
+    return {"width": w, "height": h, "variants": out}
+
+
+def _build_av(src: Path, digest: str, renditions) -> Dict[str, Any]:
+    ff = _ffmpeg()
+    out: List[Dict[str, Any]] = []
+    if not ff:
+        return {"variants": out, "note": "ffmpeg não encontrado: usando o original"}
+    for name, args, ext in renditions:
+        dst = BUILD_DIR / f"{digest[:16]}-{name}{ext}"
+        if not dst.exists():
+            tmp = dst.with_name(f".{dst.stem}.tmp{ext}")
+            r = subprocess.run([ff, "-y", "-loglevel", "error", "-i", str(src), *args, str(tmp)], capture_output=True, text=True)
+            if r.returncode != 0:
+                tmp.unlink(missing_ok=True)
+                continue
+            os.replace(tmp, dst)
+        out.append({"path": _rel(dst), "format": name, "bytes": dst.stat().st_size})
+    return {"variants": out}
+
+
+def build_assets(src_dir: Path = ASSETS_DIR, force: bool = False) -> Dict[str, Any]:
+    """
+    Gera as versões para web de tudo em assets/ (imagens WebP/JPEG em larguras
+    menores, vídeo 720p/480p e áudio AAC via ffmpeg) em data/media/build,
+    com nomes pelo hash do conteúdo, e grava o manifest.json. Arquivos cujo
+    hash não mudou são pulados.
+    """
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    old = {} if force else read_manifest().get("sources", {})
+    sources: Dict[str, Any] = {}
+    for src in sorted(p for p in Path(src_dir).iterdir() if p.is_file()):
+        kind = _kind(src)
+        if kind is None:
+            continue
+        digest = _sha256(src)
+        prev = old.get(src.name)
+        fresh = prev and prev.get("sha256") == digest and all((MEDIA_DIR / v["path"]).exists() for v in prev["variants"])
+        # build feito sem ffmpeg: refaz quando ele aparecer
+        if fresh and (prev["variants"] or kind == "image" or not _ffmpeg()):
+            sources[src.name] = prev
+            continue
+        if kind == "image":
+            info = _build_image(src, digest)
+        elif kind == "video":
+            info = _build_av(src, digest, VIDEO_RENDITIONS)
+        else:
+            info = _build_av(src, digest, AUDIO_RENDITIONS)
+        sources[src.name] = {"sha256": digest, "kind": kind, "bytes": src.stat().st_size, **info}
+
+    aliases = {}
+    for alias, names in ALIASES.items():
+        for n in names:
+            if n in sources:
+                aliases[alias] = n
+                break
+    manifest = {"version": 1, "sources": sources, "aliases": aliases}
+    tmp = MANIFEST_PATH.with_name(f".{MANIFEST_PATH.name}.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, MANIFEST_PATH)
+
+    # limpa saídas antigas (hash que não está mais no manifesto)
+    keep = {MEDIA_DIR / v["path"] for s in sources.values() for v in s["variants"]} | {MANIFEST_PATH}
+    for p in BUILD_DIR.iterdir():
+        if p.is_file() and p not in keep:
+            p.unlink()
+    return manifest
+
+
+def read_manifest() -> Dict[str, Any]:
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+# ====== resolução em tempo de execução (uma vez por processo) ======
+
+_resolved: Optional[Dict[str, Optional[Path]]] = None
+_resolved_lock = threading.Lock()
+
+# preferência por tipo: WebP na maior largura gerada; vídeo 720p; áudio 96k
+_PREFER = {
+    "image": lambda v: (v["format"] != "webp", -v.get("width", 0)),
+    "video": lambda v: (v["format"] != "720p",),
+    "audio": lambda v: (v["format"] != "96k",),
+}
+
+
+def _resolve_all() -> Dict[str, Optional[Path]]:
+    manifest = read_manifest()
+    sources = manifest.get("sources", {})
+    out: Dict[str, Optional[Path]] = {}
+    for alias, names in ALIASES.items():
+        name = manifest.get("aliases", {}).get(alias)
+        info = sources.get(name) if name else None
+        best = None
+        if info and info.get("variants"):
+            v = sorted(info["variants"], key=_PREFER[info["kind"]])[0]
+            p = MEDIA_DIR / v["path"]
+            best = p if p.exists() else None
+        if best is None:
+            # sem build: o primeiro original que existir
+            best = next((ASSETS_DIR / n for n in names if (ASSETS_DIR / n).exists()), None)
+        out[alias] = best
+    return out
+
+
+def asset(alias: str) -> Optional[Path]:
+    """Arquivo a servir para um nome lógico ("intro_photo", ...); resolvido uma vez só."""
+    global _resolved
+    if _resolved is None:
+        with _resolved_lock:
+            if _resolved is None:
+                _resolved = _resolve_all()
+    return _resolved.get(alias)
+
+
+def reset() -> None:
+    global _resolved
+    _resolved = None
@@ -1,48 +1,252 @@
+import uuid
+
 import streamlit as st
-import random
+
+from rpg.dice import DiceError
+from rpg.encounter import CONDITIONS, EncounterEngine
+from rpg.models import Combatant
+from rpg.storage import (
+    delete_encounter,
+    list_character_summaries,
+    list_encounter_summaries,
+    list_monster_summaries,
+    load_character,
+    load_monster,
+    save_character,
+)
+from rpg.table_state import StaleEncounterError, TableHub, get_hub
+
+
+def _open_engine(hub: TableHub) -> EncounterEngine:
+    # o encontro aberto é o da mesa (hub): mestre e jogadores veem a mesma iniciativa
+    enc = hub.load_encounter()
+    if enc is None:
+        eng = EncounterEngine.new()
+        hub.save_encounter(eng.enc)
+        return eng
+    return EncounterEngine(enc)
+
 
 def render():
     st.header("Combate")
 
-    if "combat" not in st.session_state:
-        st.session_state["combat"] = {"round": 1, "turn": 0, "combatants": []}
+    hub = get_hub()
+    hub.refresh()
+    eng = _open_engine(hub)
+    enc = eng.enc
+
+    # versão do encontro que esta sessão tinha na tela: um clique vale para
+    # ela; se outro dispositivo gravou depois, a alteração é recusada
+    seen = st.session_state.get("enc_seen")
+    base = seen[1] if seen and seen[0] == enc.id else hub.enc_version
+    st.session_state["enc_seen"] = (enc.id, hub.enc_version)
+    if st.session_state.pop("enc_stale", False):
+        st.warning("O encontro foi alterado em outro dispositivo — sua última ação não foi aplicada. Tela atualizada.")
 
-    combat = st.session_state["combat"]
+    def save() -> bool:
+        try:
+            st.session_state["enc_seen"] = (enc.id, hub.save_encounter(enc, expected_version=base))
+            return True
+        except StaleEncounterError:
+            st.session_state["enc_stale"] = True
+            return False
+
+    def commit() -> None:
+        save()
+        st.rerun()
+
+    with st.expander("Encontros salvos", expanded=False):
+        rows = list_encounter_summaries()
+        labels = {r["id"]: f"{r['name']} — rodada {r['round']} • {r['combatants']} combatentes" for r in rows}
+        ids = list(labels)
+        if ids:
+            pick = st.selectbox(
+                "Abrir encontro",
+                ids,
+                index=ids.index(enc.id) if enc.id in ids else 0,
+                format_func=lambda i: labels[i],
+                key="enc_pick",
+            )
+            if pick != enc.id:
+                hub.set_encounter(pick)
+                st.rerun()
+
+        c1, c2 = st.columns(2)
+        # o campo é comparado com o nome que ele recebeu, não com o recém-carregado:
+        # um nome trocado em outro dispositivo entra no campo em vez de ser desfeito
+        name_key = f"enc_name_{enc.id}"
+        if st.session_state.get(f"{name_key}_seed") != enc.name:
+            st.session_state[name_key] = st.session_state[f"{name_key}_seed"] = enc.name
+        new_name = c1.text_input("Nome do encontro", key=name_key)
+        if new_name != st.session_state[f"{name_key}_seed"]:
+            enc.name = new_name
+            if save():
+                st.session_state[f"{name_key}_seed"] = new_name
+            else:
+                st.rerun()
+        if c2.button("➕ Novo encontro", use_container_width=True):
+            hub.set_encounter(None)
+            st.rerun()
+        if c2.button("🗑️ Excluir este encontro", use_container_width=True):
+            delete_encounter(enc.id)
+            hub.set_encounter(None)
+            st.rerun()
 
     with st.expander("Adicionar combatente", expanded=True):
         name = st.text_input("Nome", value="Goblin")
         initb = st.number_input("Bonus iniciativa", -20, 20, value=2)
-        if st.button("Adicionar"):
-            combat["combatants"].append({"name": name, "initb": int(initb), "init": None})
-            st.rerun()
+        a1, a2 = st.columns(2)
+        if a1.button("Adicionar"):
+            eng.add(Combatant(id=uuid.uuid4().hex[:10], name=name, init_bonus=int(initb)))
+            commit()
+        if a2.button("Adicionar e rolar iniciativa"):
+            c = Combatant(id=uuid.uuid4().hex[:10], name=name, init_bonus=int(initb))
+            # dados do próprio encontro (semente + passo salvo): outra sessão não repete a rolagem
+            c.initiative = eng.next_rng().roll(20) + c.init_bonus
+            c.tiebreak = float(c.init_bonus)
+            eng.add(c)
+            commit()
+
+        chars = list_character_summaries()
+        if chars:
+            cids = [r["id"] for r in chars]
+            names = {r["id"]: r["name"] for r in chars}
+            pick = st.selectbox("...ou um jogador", cids, format_func=lambda i: names[i], key="enc_add_char")
+            if st.button("Adicionar jogador"):
+                ch = load_character(pick)
+                if ch:
+                    eng.add(
+                        Combatant(
+                            id=uuid.uuid4().hex[:10],
+                            name=ch.character_name,
+                            kind="character",
+                            ref_id=ch.id,
+                            init_bonus=ch.initiative_bonus,
+                            ac=ch.ac,
+                            max_hp=ch.max_hp,
+                            hp=ch.current_hp,
+                        )
+                    )
+                    commit()
 
-    cols = st.columns(3)
+        mons = list_monster_summaries()
+        if mons:
+            st.divider()
+            mids = [r["id"] for r in mons]
+            mnames = {r["id"]: f"{r['name']} (CR {r['cr']})" for r in mons}
+            g1, g2 = st.columns([0.7, 0.3])
+            mpick = g1.selectbox("...ou um grupo do bestiário", mids, format_func=lambda i: mnames[i], key="enc_add_mon")
+            count = g2.number_input("Quantidade", 1, 500, value=5, key="enc_add_count")
+            o1, o2 = st.columns(2)
+            roll_hp = o1.checkbox("Rolar HP (hit dice)", value=False, key="enc_roll_hp")
+            roll_init = o2.checkbox("Rolar iniciativa", value=True, key="enc_roll_init")
+            if st.button("Adicionar grupo"):
+                m = load_monster(mpick)
+                if m:
+                    try:
+                        eng.spawn_group(m, int(count), roll_hp=roll_hp, roll_init=roll_init)
+                    except DiceError as e:
+                        st.error(f"Dados de vida inválidos: {e}")
+                    else:
+                        commit()
+
+    cols = st.columns(4)
     if cols[0].button("Rolar iniciativa"):
-        for c in combat["combatants"]:
-            c["init"] = random.randint(1, 20) + c["initb"]
-        combat["combatants"].sort(key=lambda x: x["init"] or 0, reverse=True)
-        combat["turn"] = 0
-        combat["round"] = 1
-        st.rerun()
+        eng.roll_initiative()
+        commit()
 
-    if cols[1].button("Proximo turno") and combat["combatants"]:
-        combat["turn"] = (combat["turn"] + 1) % len(combat["combatants"])
-        if combat["turn"] == 0:
-            combat["round"] += 1
-        st.rerun()
+    if cols[1].button("Rolar faltantes"):
+        eng.roll_initiative(only_missing=True)
+        commit()
 
-    if cols[2].button("Limpar"):
-        combat["combatants"] = []
-        combat["turn"] = 0
-        combat["round"] = 1
-        st.rerun()
+    if cols[2].button("Proximo turno") and len(eng):
+        eng.next_turn()
+        commit()
+
+    if cols[3].button("Limpar"):
+        eng.reset()
+        commit()
 
-    st.write("Rodada:", combat["round"])
+    st.write("Rodada:", enc.round)
+    st.caption(f"Semente do encontro: `{enc.seed}` • id `{enc.id}` • encontro v{hub.enc_version}")
 
-    if not combat["combatants"]:
+    if not len(eng):
         st.info("Adicione combatentes.")
         return
 
-    for i, c in enumerate(combat["combatants"]):
-        marker = "➡️ " if i == combat["turn"] else ""
-        st.write(f"{marker}{c['name']} — Init: {c['init']}")
+    with st.expander("🩸 Dano / cura", expanded=False):
+        with_hp = [c for c in eng.ordered() if eng.hp_of(c)[0] is not None]
+        if not with_hp:
+            st.caption("Ninguém com HP controlado no encontro.")
+        else:
+            names = {c.id: c.name for c in with_hp}
+            h1, h2, h3 = st.columns([0.5, 0.25, 0.25])
+            tid = h1.selectbox("Combatente", list(names), format_func=lambda i: names[i], key="enc_hp_target")
+            amount = h2.number_input("Dano (negativo = cura)", -999, 999, value=0, key="enc_hp_amount")
+            if h3.button("Aplicar", key="enc_hp_apply", use_container_width=True):
+                hp = eng.damage(tid, int(amount))
+                c = enc.combatants[tid]
+                if c.kind == "character" and c.ref_id and hp is not None:
+                    # a ficha do jogador acompanha o HP do combate
+                    ch = load_character(c.ref_id)
+                    if ch:
+                        ch.current_hp = hp
+                        save_character(ch)
+                commit()
+
+    for c in eng.ordered():
+        marker = "➡️ " if c.id == enc.turn_id else ""
+        row = st.columns([0.52, 0.16, 0.16, 0.16])
+        cur, mx = eng.hp_of(c)
+        hp = f" — HP {cur}/{mx}" if cur is not None else ""
+        conds = eng.conditions_for(c)
+        tags = f" — _{', '.join(conds)}_" if conds else ""
+        row[0].write(f"{marker}{c.name} — Init: {c.initiative}{hp}{tags}")
+        if row[1].button("⏳ Atrasar", key=f"delay_{c.id}", use_container_width=True):
+            eng.delay(c.id)
+            commit()
+        if row[2].button("⬇️ Após atual", key=f"after_{c.id}", use_container_width=True, disabled=c.id == enc.turn_id):
+            eng.delay(c.id, after_id=enc.turn_id)
+            commit()
+        if row[3].button("❌ Remover", key=f"rm_{c.id}", use_container_width=True):
+            eng.remove(c.id)
+            commit()
+
+    for gid, g in list(enc.groups.items()):
+        members = eng.group_members(gid)
+        alive = sum(1 for c in members if g.hp[c.slot] > 0)
+        with st.expander(f"👹 {g.name} — {alive}/{len(members)} de pé • CA {g.ac}", expanded=False):
+            st.dataframe(
+                [
+                    {
+                        "#": c.slot + 1,
+                        "Init": c.initiative,
+                        "HP": g.hp[c.slot],
+                        "HP máx": g.max_hp[c.slot],
+                        "Condições": ", ".join(eng.conditions_for(c)),
+                    }
+                    for c in members
+                ],
+                hide_index=True,
+                use_container_width=True,
+            )
+            slots = [c.slot for c in members]
+            targets = st.multiselect(
+                "Membros", slots, default=slots, format_func=lambda s: f"#{s + 1}", key=f"grp_sel_{gid}"
+            )
+            d1, d2 = st.columns([0.5, 0.5])
+            amount = d1.number_input("Dano (negativo = cura)", -999, 999, value=0, key=f"grp_dmg_{gid}")
+            if d2.button("Aplicar dano", key=f"grp_apply_{gid}", use_container_width=True, disabled=not targets):
+                eng.damage_group(gid, targets, int(amount))
+                commit()
+            conds = st.multiselect("Condições", CONDITIONS, key=f"grp_cond_{gid}")
+            k1, k2, k3 = st.columns(3)
+            if k1.button("Aplicar condições", key=f"grp_con_on_{gid}", use_container_width=True, disabled=not (targets and conds)):
+                eng.set_group_conditions(gid, targets, conds, on=True)
+                commit()
+            if k2.button("Retirar condições", key=f"grp_con_off_{gid}", use_container_width=True, disabled=not (targets and conds)):
+                eng.set_group_conditions(gid, targets, conds, on=False)
+                commit()
+            if k3.button("Remover caídos (HP ≤ 0)", key=f"grp_dead_{gid}", use_container_width=True):
+                eng.remove_defeated(gid)
+                commit()
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
-import random
 import re
-from typing import Dict, List
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 
-def roll_d20(bonus: int = 0, advantage: bool = False, disadvantage: bool = False) -> Dict:
-    rolls = [random.randint(1, 20)]
+from .rng import DEFAULT_RNG, DiceRNG
+
+
+def roll_d20(bonus: int = 0, advantage: bool = False, disadvantage: bool = False, rng: Optional[DiceRNG] = None) -> Dict:
+    rng = rng or DEFAULT_RNG
+    rolls = [rng.roll(20)]
     if advantage or disadvantage:
-        rolls.append(random.randint(1, 20))
+        rolls.append(rng.roll(20))
         chosen = max(rolls) if advantage and not disadvantage else min(rolls)
     else:
         chosen = rolls[0]
@@ -16,20 +22,111 @@ def roll_d20(bonus: int = 0, advantage: bool = False, disadvantage: bool = False
     return {"type": "d20", "rolls": rolls, "chosen": chosen, "bonus": int(bonus), "total": total}
 
 
-def _roll_term(n: int, sides: int) -> List[int]:
-    return [random.randint(1, sides) for _ in range(n)]
+def _roll_term(n: int, sides: int, rng: Optional[DiceRNG] = None) -> List[int]:
+    return (rng or DEFAULT_RNG).roll_n(n, sides)
+
+
+# ====== expressões compiladas ======
+# "2d6+1d4+3" vira uma tupla de termos imutáveis; o mesmo objeto serve para
+# o dano normal e (via .crit()) para o dano crítico.
+
+_TOKEN_RE = re.compile(r"[+\-]?\d*d?\d+|[+\-]?\d+")
+
+
+class DiceError(ValueError):
+    """Expressão de dados inválida (ex.: "1d0")."""
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    n: int
+    sides: int
+    sign: int = 1
+
+
+@dataclass(frozen=True)
+class FlatTerm:
+    value: int
+
+
+Term = Union[DiceTerm, FlatTerm]
+
+
+@dataclass(frozen=True)
+class CompiledExpr:
+    expr: str
+    terms: Tuple[Term, ...]
+
+    @property
+    def dice(self) -> Tuple[DiceTerm, ...]:
+        return tuple(t for t in self.terms if isinstance(t, DiceTerm))
+
+    @property
+    def flat(self) -> int:
+        return sum(t.value for t in self.terms if isinstance(t, FlatTerm))
+
+    def crit(self) -> "CompiledExpr":
+        # dobra apenas os dados: 2d6+3 -> 4d6+3
+        return _crit_of(self)
+
+    def roll(self, rng: Optional[DiceRNG] = None) -> Dict:
+        terms = []
+        total = 0
+        for t in self.terms:
+            if isinstance(t, DiceTerm):
+                rolls = _roll_term(t.n, t.sides, rng)
+                subtotal = sum(rolls) * t.sign
+                total += subtotal
+                terms.append({"kind": "dice", "n": t.n, "sides": t.sides, "rolls": rolls, "sign": t.sign, "subtotal": subtotal})
+            else:
+                total += t.value
+                terms.append({"kind": "flat", "value": t.value})
+        return {"type": "expr", "expr": self.expr, "terms": terms, "total": total}
+
+    def roll_many(self, n: int, rng: Optional[DiceRNG] = None) -> Dict:
+        # todos os dados dos N ensaios saem de uma única chamada ao gerador
+        n = max(0, int(n))
+        dice = self.dice
+        highs = np.repeat([t.sides + 1 for t in dice], [t.n for t in dice]).astype(np.int64)
+        rng = rng or DEFAULT_RNG
+        faces = rng.integers(highs, size=(n, highs.size)) if highs.size else np.zeros((n, 0), dtype=np.int64)
+
+        terms = []
+        totals = np.zeros(n, dtype=np.int64)
+        col = 0
+        for t in self.terms:
+            if isinstance(t, DiceTerm):
+                rolls = faces[:, col:col + t.n]
+                col += t.n
+                subtotals = rolls.sum(axis=1) * t.sign
+                totals += subtotals
+                terms.append({"kind": "dice", "n": t.n, "sides": t.sides, "sign": t.sign, "rolls": rolls, "subtotals": subtotals})
+            else:
+                totals += t.value
+                terms.append({"kind": "flat", "value": t.value})
+        return {"type": "expr_many", "expr": self.expr, "n": n, "terms": terms, "totals": totals}
+
+
+def _normalize(expr: str) -> str:
+    return (expr or "").strip().lower().replace(" ", "")
 
 
-def roll_expr(expr: str) -> Dict:
-    expr = (expr or "").strip().lower().replace(" ", "")
-    if not expr:
-        return {"type": "expr", "expr": "", "terms": [], "total": 0}
+def _render(terms: Tuple[Term, ...]) -> str:
+    out = []
+    for t in terms:
+        if isinstance(t, DiceTerm):
+            sign = "-" if t.sign < 0 else "+"
+            out.append(f"{sign}{t.n}d{t.sides}")
+        else:
+            out.append(f"{t.value:+d}")
+    s = "".join(out)
+    return s[1:] if s.startswith("+") else s
 
-    tokens = re.findall(r"[+\-]?\d*d?\d+|[+\-]?\d+", expr)
-    terms = []
-    total = 0
 
-    for tok in tokens:
+@lru_cache(maxsize=512)
+def _compile_normalized(expr: str) -> CompiledExpr:
+    terms: List[Term] = []
+    for tok in _TOKEN_RE.findall(expr):
         sign = 1
         t = tok
         if t.startswith("+"):
@@ -40,46 +137,112 @@ def roll_expr(expr: str) -> Dict:
 
         if "d" in t:
             n_s, s_s = t.split("d", 1)
-            n = int(n_s) if n_s else 1
             sides = int(s_s)
-            rolls = _roll_term(n, sides)
-            subtotal = sum(rolls) * sign
-            total += subtotal
-            terms.append({"kind": "dice", "n": n, "sides": sides, "rolls": rolls, "sign": sign, "subtotal": subtotal})
+            if sides < 1:
+                # validado aqui, uma vez: rolagem única, em lote e distribuição usam o mesmo parser
+                raise DiceError(f"dado sem faces em {expr!r}: {tok} (o dado precisa de pelo menos 1 face)")
+            terms.append(DiceTerm(n=int(n_s) if n_s else 1, sides=sides, sign=sign))
         else:
-            val = int(t) * sign
-            total += val
-            terms.append({"kind": "flat", "value": val})
+            terms.append(FlatTerm(value=int(t) * sign))
+    return CompiledExpr(expr=expr, terms=tuple(terms))
+
+
+@lru_cache(maxsize=512)
+def _crit_of(c: CompiledExpr) -> CompiledExpr:
+    terms = tuple(DiceTerm(n=2 * t.n, sides=t.sides, sign=t.sign) if isinstance(t, DiceTerm) else t for t in c.terms)
+    return CompiledExpr(expr=_render(terms), terms=terms)
+
+
+def compile_expr(expr: Union[str, CompiledExpr]) -> CompiledExpr:
+    """Compila (com cache LRU pela string normalizada) uma expressão tipo "2d6+1d4+3"."""
+    if isinstance(expr, CompiledExpr):
+        return expr
+    return _compile_normalized(_normalize(expr))
+
+
+def roll_expr(expr: Union[str, CompiledExpr], rng: Optional[DiceRNG] = None) -> Dict:
+    return compile_expr(expr).roll(rng)
 
-    return {"type": "expr", "expr": expr, "terms": terms, "total": total}
 
+def roll_many(expr: Union[str, CompiledExpr], n: int, rng: Optional[DiceRNG] = None) -> Dict:
+    """Rola a expressão N vezes de uma vez; "totals" e "rolls"/"subtotals" são arrays NumPy."""
+    return compile_expr(expr).roll_many(n, rng)
+
+
+def roll_d20_many(
+    bonus: int = 0,
+    n: int = 1,
+    advantage: bool = False,
+    disadvantage: bool = False,
+    rng: Optional[DiceRNG] = None,
+) -> Dict:
+    n = max(0, int(n))
+    k = 2 if (advantage or disadvantage) else 1
+    rolls = (rng or DEFAULT_RNG).integers(21, size=(n, k))
+    if k == 2:
+        chosen = rolls.max(axis=1) if advantage and not disadvantage else rolls.min(axis=1)
+    else:
+        chosen = rolls[:, 0]
+    totals = chosen + int(bonus)
+    return {"type": "d20_many", "n": n, "rolls": rolls, "chosen": chosen, "bonus": int(bonus), "totals": totals}
 
-def roll_dice(expr: str) -> Dict:
-    return roll_expr(expr)
+
+def roll_attacks_many(
+    to_hit: int,
+    damage: Optional[Union[str, CompiledExpr]],
+    n: int,
+    ac: int = 0,
+    advantage: bool = False,
+    disadvantage: bool = False,
+    rng: Optional[DiceRNG] = None,
+    roll_damage: bool = True,
+) -> Dict:
+    """
+    N ataques de uma vez (horda): mesma regra do ataque avulso — nat 1 erra,
+    nat 20 é crítico (dados dobrados), ac=0 ignora a CA (ac pode ser um
+    array com uma CA por ataque). Acertos normais e críticos rolam o dano
+    em um lote cada.
+    """
+    rr = roll_d20_many(to_hit, n, advantage, disadvantage, rng)
+    chosen = rr["chosen"]
+    ac_arr = np.asarray(ac, dtype=np.int64)  # escalar ou uma CA por ataque
+    crit = chosen == 20
+    hit = crit | ((chosen != 1) & ((ac_arr <= 0) | (rr["totals"] >= ac_arr)))
+
+    dmg = np.zeros(rr["n"], dtype=np.int64)
+    if roll_damage and damage:
+        c = compile_expr(damage)
+        normal = hit & ~crit
+        if normal.any():
+            dmg[normal] = c.roll_many(int(normal.sum()), rng)["totals"]
+        if crit.any():
+            dmg[crit] = c.crit().roll_many(int(crit.sum()), rng)["totals"]
+
+    return {
+        "type": "attacks_many",
+        "n": rr["n"],
+        "bonus": rr["bonus"],
+        "ac": ac,
+        "rolls": rr["rolls"],
+        "chosen": chosen,
+        "totals": rr["totals"],
+        "hit": hit,
+        "crit": crit,
+        "damage": dmg,
+        "hits": int(hit.sum()),
+        "crits": int(crit.sum()),
+        "total_damage": int(dmg.sum()),
+    }
+
+
+def roll_dice(expr: Union[str, CompiledExpr], rng: Optional[DiceRNG] = None) -> Dict:
+    return roll_expr(expr, rng)
 
 
 def critify(expr: str) -> str:
     # dobra apenas os dados: 2d6+3 -> 4d6+3
-    expr = (expr or "").strip().lower().replace(" ", "")
-    if not expr:
-        return expr
-    parts = re.split(r"(?=[+\-])", expr)
-    out = []
-    for p in parts:
-        if not p:
-            continue
-        sign = ""
-        t = p
-        if t[0] in "+-":
-            sign = t[0]
-            t = t[1:]
-        if "d" in t:
-            n_s, s_s = t.split("d", 1)
-            n = int(n_s) if n_s else 1
-            out.append(f"{sign}{2*n}d{s_s}")
-        else:
-            out.append(f"{sign}{t}")
-    return "".join(out)
+    c = compile_expr(expr)
+    return c.crit().expr if c.terms else c.expr
 
 
 def fmt_d20(rr: Dict) -> str:
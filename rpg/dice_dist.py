@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Union
+
+import numpy as np
+
+from .dice import CompiledExpr, DiceTerm, compile_expr
+
+
+# ====== distribuição exata (PMF) de uma expressão ======
+# Soma de dados = convolução das PMFs uniformes. Fazemos tudo num único
+# produto de espectros (rfft), então 20d12+10d6 sai em microssegundos.
+
+
+@dataclass(frozen=True)
+class Distribution:
+    offset: int          # valor correspondente a pmf[0]
+    pmf: np.ndarray      # probabilidades (somam 1), somente leitura
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.arange(self.offset, self.offset + self.pmf.size)
+
+    @property
+    def min(self) -> int:
+        return self.offset
+
+    @property
+    def max(self) -> int:
+        return self.offset + self.pmf.size - 1
+
+    @property
+    def mean(self) -> float:
+        return float(np.dot(self.values, self.pmf))
+
+    @property
+    def var(self) -> float:
+        v = self.values - self.mean
+        return float(np.dot(v * v, self.pmf))
+
+    @property
+    def std(self) -> float:
+        return self.var ** 0.5
+
+    def cdf(self) -> np.ndarray:
+        return np.cumsum(self.pmf)
+
+    def percentile(self, q: float) -> int:
+        # menor valor v com P(X <= v) >= q  (q em 0..100)
+        idx = int(np.searchsorted(self.cdf(), min(max(q, 0.0), 100.0) / 100.0 - 1e-12))
+        return self.offset + min(idx, self.pmf.size - 1)
+
+    def prob_at_least(self, v: int) -> float:
+        i = int(v) - self.offset
+        if i <= 0:
+            return 1.0
+        if i >= self.pmf.size:
+            return 0.0
+        return float(self.pmf[i:].sum())
+
+
+def _frozen(pmf: np.ndarray) -> np.ndarray:
+    pmf = np.clip(pmf, 0.0, None)
+    pmf = pmf / pmf.sum()
+    pmf.setflags(write=False)
+    return pmf
+
+
+@lru_cache(maxsize=256)
+def _distribution_of(c: CompiledExpr) -> Distribution:
+    dice = c.dice
+    # -XdY tem a mesma forma de +XdY (uniforme é simétrica); só muda o deslocamento
+    offset = c.flat + sum(t.n if t.sign > 0 else -t.n * t.sides for t in dice)
+    size = 1 + sum(t.n * (t.sides - 1) for t in dice)
+    if size == 1:
+        return Distribution(offset=offset, pmf=_frozen(np.ones(1)))
+
+    spec = np.ones(size // 2 + 1, dtype=np.complex128)
+    for t in dice:
+        spec *= np.fft.rfft(np.full(t.sides, 1.0 / t.sides), size) ** t.n
+    return Distribution(offset=offset, pmf=_frozen(np.fft.irfft(spec, size)))
+
+
+def distribution(expr: Union[str, CompiledExpr]) -> Distribution:
+    """PMF exata de uma expressão tipo "2d6+1d4+3" (memoizada por expressão)."""
+    return _distribution_of(compile_expr(expr))
+
+
+def describe(expr: Union[str, CompiledExpr]) -> Dict:
+    d = distribution(expr)
+    return {
+        "min": d.min,
+        "max": d.max,
+        "mean": d.mean,
+        "std": d.std,
+        "p10": d.percentile(10),
+        "p50": d.percentile(50),
+        "p90": d.percentile(90),
+    }
+
+
+# ====== ataque vs AC ======
+
+
+def _d20_face_probs(advantage: bool, disadvantage: bool) -> np.ndarray:
+    k = np.arange(1, 21, dtype=float)
+    if advantage and not disadvantage:
+        return (k * k - (k - 1) ** 2) / 400.0
+    if advantage or disadvantage:
+        # igual ao roll_d20: com as duas marcadas vale o menor
+        return ((21 - k) ** 2 - (20 - k) ** 2) / 400.0
+    return np.full(20, 1.0 / 20.0)
+
+
+@lru_cache(maxsize=1024)
+def attack_odds(to_hit: int, ac: int = 0, advantage: bool = False, disadvantage: bool = False) -> Dict[str, float]:
+    """
+    Mesmas regras do botão de ataque dos monstros:
+    nat 1 erra, nat 20 é crítico, senão acerta se total >= AC (AC 0 = ignorar).
+    """
+    probs = _d20_face_probs(advantage, disadvantage)
+    faces = np.arange(1, 21)
+    if ac:
+        normal_hit = (faces + int(to_hit) >= int(ac)) & (faces != 1) & (faces != 20)
+    else:
+        normal_hit = (faces != 1) & (faces != 20)
+    p_crit = float(probs[19])
+    p_hit = float(probs[normal_hit].sum()) + p_crit
+    return {"p_hit": p_hit, "p_crit": p_crit, "p_miss": 1.0 - p_hit}
+
+
+@lru_cache(maxsize=1024)
+def _attack_damage(to_hit: int, damage: CompiledExpr, ac: int, advantage: bool, disadvantage: bool) -> Dict:
+    odds = attack_odds(to_hit, ac, advantage, disadvantage)
+    normal = distribution(damage)
+    crit = distribution(damage.crit())
+
+    # mistura: erro -> 0, acerto normal -> dano, crítico -> dano com dados dobrados
+    lo = min(0, normal.min, crit.min)
+    hi = max(0, normal.max, crit.max)
+    pmf = np.zeros(hi - lo + 1)
+    pmf[0 - lo] += odds["p_miss"]
+    pmf[normal.min - lo:normal.max - lo + 1] += (odds["p_hit"] - odds["p_crit"]) * normal.pmf
+    pmf[crit.min - lo:crit.max - lo + 1] += odds["p_crit"] * crit.pmf
+    per_attack = Distribution(offset=lo, pmf=_frozen(pmf))
+
+    return {
+        **odds,
+        "mean_on_hit": normal.mean,
+        "mean_on_crit": crit.mean,
+        "expected_damage": per_attack.mean,
+        "distribution": per_attack,
+    }
+
+
+def expected_attack_damage(
+    to_hit: int,
+    damage: Union[str, CompiledExpr],
+    ac: int = 0,
+    advantage: bool = False,
+    disadvantage: bool = False,
+) -> Dict:
+    """Chance de acerto/crítico e dano esperado por ataque (inclui a regra do critify)."""
+    return _attack_damage(int(to_hit), compile_expr(damage), int(ac), bool(advantage), bool(disadvantage))
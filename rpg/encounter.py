@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+import secrets
+import uuid
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .dice import roll_d20_many, roll_many
+from .models import Combatant, Encounter, Monster, MonsterGroup
+from .rng import DiceRNG
+
+_NO_INIT = -10**9  # quem não rolou iniciativa fica no fim da fila
+
+# condições dos membros de grupo: bit i do inteiro = CONDITIONS[i]
+CONDITIONS = (
+    "Agarrado",
+    "Amedrontado",
+    "Atordoado",
+    "Caído",
+    "Cego",
+    "Contido",
+    "Enfeitiçado",
+    "Envenenado",
+    "Exausto",
+    "Incapacitado",
+    "Inconsciente",
+    "Invisível",
+    "Paralisado",
+    "Petrificado",
+    "Surdo",
+)
+
+
+def conditions_mask(names: Iterable[str]) -> int:
+    return sum(1 << CONDITIONS.index(n) for n in set(names) if n in CONDITIONS)
+
+
+def conditions_of(mask: int) -> List[str]:
+    return [n for i, n in enumerate(CONDITIONS) if mask >> i & 1]
+
+
+def _key(c: Combatant) -> Tuple[int, float, int]:
+    # ordem crescente da chave = ordem dos turnos (maior iniciativa primeiro)
+    init = c.initiative if c.initiative is not None else _NO_INIT
+    return (-init, -c.tiebreak, c.seq)
+
+
+class EncounterEngine:
+    """
+    Fila de turnos de um Encounter. A ordem fica em enc.order e as chaves
+    ordenadas em self._keys: inserir, remover ou atrasar alguém é uma busca
+    binária (bisect) em vez de reordenar a lista inteira. O turno atual é
+    guardado pelo id do combatente, então não se perde com inserções.
+    """
+
+    def __init__(self, enc: Encounter):
+        self.enc = enc
+        # enc.order já vem ordenada do disco; só normaliza ids órfãos/faltando
+        ids = [cid for cid in enc.order if cid in enc.combatants]
+        missing = [cid for cid in enc.combatants if cid not in set(ids)]
+        if missing or len(ids) != len(enc.order):
+            ids = sorted(enc.combatants, key=lambda cid: _key(enc.combatants[cid]))
+        enc.order = ids
+        self._keys: List[Tuple[int, float, int]] = [_key(enc.combatants[cid]) for cid in ids]
+
+    @classmethod
+    def new(cls, name: str = "Encontro", seed: Optional[int] = None) -> "EncounterEngine":
+        enc = Encounter(
+            id=uuid.uuid4().hex[:10],
+            name=name,
+            seed=int(seed) if seed is not None else secrets.randbits(32),
+        )
+        return cls(enc)
+
+    # ---- consulta ----
+
+    def __len__(self) -> int:
+        return len(self.enc.order)
+
+    def ordered(self) -> List[Combatant]:
+        return [self.enc.combatants[cid] for cid in self.enc.order]
+
+    def _index(self, cid: str) -> int:
+        c = self.enc.combatants[cid]
+        i = bisect.bisect_left(self._keys, _key(c))
+        # chaves são únicas (seq); se um encontro antigo tiver repetidas, acha pelo id
+        if i < len(self.enc.order) and self.enc.order[i] == cid:
+            return i
+        return self.enc.order.index(cid)
+
+    @property
+    def current(self) -> Optional[Combatant]:
+        cid = self.enc.turn_id
+        return self.enc.combatants.get(cid) if cid else None
+
+    # ---- alterações na fila ----
+
+    def _insert(self, c: Combatant) -> None:
+        k = _key(c)
+        i = bisect.bisect_right(self._keys, k)
+        self._keys.insert(i, k)
+        self.enc.order.insert(i, c.id)
+
+    def _detach(self, cid: str) -> int:
+        i = self._index(cid)
+        del self._keys[i]
+        del self.enc.order[i]
+        return i
+
+    def add(self, c: Combatant) -> Combatant:
+        """Entra na fila na posição da iniciativa (pode ser no meio do combate)."""
+        if not c.id:
+            c.id = uuid.uuid4().hex[:10]
+        if c.id in self.enc.combatants:
+            self.remove(c.id)
+        c.seq = self.enc.next_seq
+        self.enc.next_seq += 1
+        self.enc.combatants[c.id] = c
+        self._insert(c)
+        if self.enc.turn_id is None:
+            self.enc.turn_id = self.enc.order[0]
+        return c
+
+    def add_many(self, cs: Iterable[Combatant]) -> None:
+        """Entrada em lote: ordena só os novos e intercala com a fila (uma passada)."""
+        new: List[Tuple[Tuple[int, float, int], str]] = []
+        for c in cs:
+            if not c.id:
+                c.id = uuid.uuid4().hex[:10]
+            if c.id in self.enc.combatants:
+                self.remove(c.id)
+            c.seq = self.enc.next_seq
+            self.enc.next_seq += 1
+            self.enc.combatants[c.id] = c
+            new.append((_key(c), c.id))
+        if not new:
+            return
+        new.sort()
+        merged = list(heapq.merge(zip(self._keys, self.enc.order), new))
+        self._keys = [k for k, _ in merged]
+        self.enc.order = [cid for _, cid in merged]
+        if self.enc.turn_id is None:
+            self.enc.turn_id = self.enc.order[0]
+
+    def spawn_group(
+        self,
+        monster: Monster,
+        count: int,
+        rng: Optional[DiceRNG] = None,
+        roll_hp: bool = False,
+        roll_init: bool = True,
+    ) -> MonsterGroup:
+        """
+        N cópias de um Monster do bestiário. HP (pelos hit_dice) e iniciativa
+        saem de uma rolagem vetorizada cada; HP/condições ficam nos arrays
+        do MonsterGroup e cada membro entra na fila como um Combatant leve.
+        """
+        count = max(0, int(count))
+        rng = rng or self.next_rng()
+        init_bonus = (monster.dex_score - 10) // 2
+
+        if roll_hp and monster.hit_dice.strip():
+            hp = np.maximum(roll_many(monster.hit_dice, count, rng)["totals"], 1).tolist()
+        else:
+            hp = [int(monster.max_hp)] * count
+        inits: Sequence[Optional[int]]
+        if roll_init:
+            inits = roll_d20_many(init_bonus, count, rng=rng)["totals"].tolist()
+        else:
+            inits = [None] * count
+
+        g = MonsterGroup(
+            id=uuid.uuid4().hex[:10],
+            name=monster.name,
+            ref_id=monster.id,
+            ac=monster.ac,
+            init_bonus=init_bonus,
+            max_hp=list(hp),
+            hp=list(hp),
+            conditions=[0] * count,
+        )
+        self.enc.groups[g.id] = g
+        self.add_many(
+            Combatant(
+                id=f"{g.id}-{i}",
+                name=f"{monster.name} #{i + 1}",
+                kind="monster",
+                ref_id=monster.id,
+                group_id=g.id,
+                slot=i,
+                init_bonus=init_bonus,
+                initiative=inits[i],
+                tiebreak=float(init_bonus),
+                ac=monster.ac,
+            )
+            for i in range(count)
+        )
+        return g
+
+    # ---- HP / condições (avulso ou membro de grupo) ----
+
+    def hp_of(self, c: Combatant) -> Tuple[Optional[int], Optional[int]]:
+        g = self.enc.groups.get(c.group_id) if c.group_id else None
+        if g is not None:
+            return g.hp[c.slot], g.max_hp[c.slot]
+        return c.hp, c.max_hp
+
+    def conditions_for(self, c: Combatant) -> List[str]:
+        g = self.enc.groups.get(c.group_id) if c.group_id else None
+        if g is not None:
+            return conditions_of(g.conditions[c.slot])
+        return list(c.conditions)
+
+    def damage(self, cid: str, amount: int) -> Optional[int]:
+        """Dano (negativo = cura, até o máximo) em um combatente; devolve o HP novo."""
+        c = self.enc.combatants[cid]
+        if c.group_id and c.group_id in self.enc.groups:
+            self.damage_group(c.group_id, [c.slot], amount)
+            return self.enc.groups[c.group_id].hp[c.slot]
+        if c.hp is None:
+            return None
+        hp = c.hp - int(amount)
+        c.hp = min(hp, c.max_hp) if c.max_hp is not None else hp
+        return c.hp
+
+    def group_members(self, gid: str) -> List[Combatant]:
+        """Membros ainda no encontro, na ordem dos slots."""
+        return sorted(
+            (c for c in self.enc.combatants.values() if c.group_id == gid),
+            key=lambda c: c.slot,
+        )
+
+    def damage_group(self, gid: str, slots: Sequence[int], amount: int) -> None:
+        # dano negativo = cura (limitada ao HP máximo)
+        g = self.enc.groups[gid]
+        hp = np.asarray(g.hp, dtype=np.int64)
+        idx = np.asarray(list(slots), dtype=np.int64)
+        hp[idx] = np.minimum(hp[idx] - int(amount), np.asarray(g.max_hp, dtype=np.int64)[idx])
+        g.hp = hp.tolist()
+
+    def set_group_conditions(self, gid: str, slots: Sequence[int], names: Iterable[str], on: bool = True) -> None:
+        g = self.enc.groups[gid]
+        mask = conditions_mask(names)
+        cond = np.asarray(g.conditions, dtype=np.int64)
+        idx = np.asarray(list(slots), dtype=np.int64)
+        cond[idx] = (cond[idx] | mask) if on else (cond[idx] & ~mask)
+        g.conditions = cond.tolist()
+
+    def remove_defeated(self, gid: str) -> int:
+        """Tira da fila os membros com HP <= 0; devolve quantos saíram."""
+        g = self.enc.groups[gid]
+        dead = [c.id for c in self.group_members(gid) if g.hp[c.slot] <= 0]
+        for cid in dead:
+            self.remove(cid)
+        return len(dead)
+
+    def remove(self, cid: str) -> Optional[Combatant]:
+        if cid not in self.enc.combatants:
+            return None
+        was_current = self.enc.turn_id == cid
+        i = self._detach(cid)
+        c = self.enc.combatants.pop(cid)
+        if c.group_id and not any(o.group_id == c.group_id for o in self.enc.combatants.values()):
+            self.enc.groups.pop(c.group_id, None)
+        if was_current:
+            # a vez passa para quem estava logo depois
+            if not self.enc.order:
+                self.enc.turn_id = None
+            else:
+                if i >= len(self.enc.order):
+                    i = 0
+                    self.enc.round += 1
+                self.enc.turn_id = self.enc.order[i]
+        return c
+
+    def set_initiative(self, cid: str, initiative: Optional[int], tiebreak: Optional[float] = None) -> None:
+        c = self.enc.combatants[cid]
+        self._detach(cid)
+        c.initiative = initiative
+        if tiebreak is not None:
+            c.tiebreak = tiebreak
+        self._insert(c)
+
+    def delay(self, cid: str, after_id: Optional[str] = None) -> None:
+        """
+        Atrasa o turno: sem after_id, vai para o fim da rodada; com after_id,
+        passa a agir logo depois desse combatente. Se era a vez dele, a vez
+        passa para o próximo.
+        """
+        if cid not in self.enc.combatants or cid == after_id:
+            return
+        if self.enc.turn_id == cid and len(self.enc.order) > 1:
+            self.next_turn()
+        c = self.enc.combatants[cid]
+        self._detach(cid)
+        if after_id and after_id in self.enc.combatants:
+            ref = self.enc.combatants[after_id]
+            i = self._index(after_id) + 1
+            c.initiative = ref.initiative
+            c.tiebreak = ref.tiebreak
+            # seqs novos (sempre de next_seq, nunca repetidos): o atrasado e depois,
+            # na mesma ordem, quem empata com o ref e vinha logo depois dele
+            c.seq = self.enc.next_seq
+            self.enc.next_seq += 1
+            tie = _key(ref)[:2]
+            j = i
+            while j < len(self._keys) and self._keys[j][:2] == tie:
+                o = self.enc.combatants[self.enc.order[j]]
+                o.seq = self.enc.next_seq
+                self.enc.next_seq += 1
+                self._keys[j] = _key(o)
+                j += 1
+            self._keys.insert(i, _key(c))
+            self.enc.order.insert(i, c.id)
+            return
+        last = self.enc.combatants[self.enc.order[-1]] if self.enc.order else None
+        c.initiative = (last.initiative if last and last.initiative is not None else 0) - 1
+        self._insert(c)
+
+    # ---- rolagem e turnos ----
+
+    def next_rng(self) -> DiceRNG:
+        """
+        Próximo fluxo de dados do encontro (semente + contador salvo no
+        Encounter): cada chamada rola coisas novas, e o replay pela semente
+        continua determinístico.
+        """
+        rng = DiceRNG(self.enc.seed).spawn(self.enc.rng_step)
+        self.enc.rng_step += 1
+        return rng
+
+    def roll_initiative(self, rng: Optional[DiceRNG] = None, only_missing: bool = False) -> None:
+        rng = rng or self.next_rng()
+        todo = [c for c in self.enc.combatants.values() if not (only_missing and c.initiative is not None)]
+        # um d20 por combatente, todos numa chamada só
+        d20 = rng.integers(21, size=len(todo)).tolist()
+        for c, r in zip(todo, d20):
+            c.initiative = r + c.init_bonus
+            c.tiebreak = float(c.init_bonus)
+        # rolagem geral: aqui sim reordena tudo uma vez
+        self.enc.order = sorted(self.enc.combatants, key=lambda cid: _key(self.enc.combatants[cid]))
+        self._keys = [_key(self.enc.combatants[cid]) for cid in self.enc.order]
+        if not only_missing:
+            self.enc.round = 1
+            self.enc.turn_id = self.enc.order[0] if self.enc.order else None
+
+    def next_turn(self) -> Optional[Combatant]:
+        if not self.enc.order:
+            self.enc.turn_id = None
+            return None
+        if self.enc.turn_id not in self.enc.combatants:
+            self.enc.turn_id = self.enc.order[0]
+            return self.current
+        i = self._index(self.enc.turn_id) + 1
+        if i >= len(self.enc.order):
+            i = 0
+            self.enc.round += 1
+        self.enc.turn_id = self.enc.order[i]
+        return self.current
+
+    def reset(self) -> None:
+        self.enc.combatants.clear()
+        self.enc.groups.clear()
+        self.enc.order.clear()
+        self._keys.clear()
+        self.enc.turn_id = None
+        self.enc.round = 1
+        self.enc.seed = secrets.randbits(32)
+        self.enc.rng_step = 0
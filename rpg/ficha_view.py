@@ -8,13 +8,23 @@ import streamlit as st
 from rpg.models import Character
 from rpg.storage import (
     ensure_dirs,
-    list_character_ids,
+    list_character_summaries,
     load_character,
     save_character,
+    save_characters,
     delete_character,
+    put_portrait,
+    portrait_file,
+    portrait_thumb_file,
 )
-from rpg.pdf_import import import_character_from_pdf
-from rpg.dice import roll_d20, roll_expr, fmt_d20, fmt_expr
+from rpg.pdf_import import expand_uploads, import_character_cached, import_characters_from_pdfs, import_stats
+from rpg.dice import DiceError, roll_d20, roll_expr, fmt_d20, fmt_expr
+from rpg.dice_dist import describe
+from rpg.md_render import render_sections
+from rpg.perf import render_timings, timed
+from rpg.rng import DiceRNG, session_rng
+from rpg.roll_log import LOG_POLL
+from rpg.table_state import get_hub, render_table_log
 
 
 ensure_dirs()
@@ -33,57 +43,83 @@ def _img_bytes_from_b64(b64: Optional[str]) -> Optional[bytes]:
         return None
 
 
-def render() -> None:
-    st.markdown("## 🧾 Ficha + Rolagens (clicáveis)")
-
-    if "log" not in st.session_state:
-        st.session_state["log"] = []
-    if "selected_char_id" not in st.session_state:
-        st.session_state["selected_char_id"] = None
-
-    def log(line: str) -> None:
-        st.session_state["log"].insert(0, line)
-
-    # coluna 1 = roster/import | coluna 2 = ficha | coluna 3 = log
-    col_roster, col_sheet, col_log = st.columns([0.23, 0.52, 0.25], gap="large")
+# Cada bloco interativo da página é um fragmento: clicar num dado re-executa
+# só o bloco clicado, não o roster, as áreas de texto e a tabela de campos do
+# PDF. O log é outro fragmento, que a cada LOG_POLL s re-executa só ele mesmo
+# (e assim também mostra as rolagens dos outros jogadores); nunca a página toda.
+# Abrir/excluir/importar ficha e trocar a foto recarregam a página toda.
 
-    # ====== ROSTER / IMPORT ======
-    with col_roster:
+@st.fragment
+def _roster_fragment() -> None:
+    with timed("ficha.roster"):
         st.markdown("### 👥 Jogadores")
 
         with st.expander("📥 Importar ficha por PDF", expanded=False):
             up = st.file_uploader("Envie o PDF da ficha", type=["pdf"], key="pdf_upload")
             if up is not None:
+                # cache por SHA-256: reruns não re-parseiam o PDF e o id fica estável
                 pdf_bytes = up.getvalue()
-                ch = import_character_from_pdf(pdf_bytes)
+                ch = import_character_cached(pdf_bytes)
 
                 st.success(f"Detectado: **{ch.character_name}** ({ch.class_and_level})")
+                st.caption(f"Layout da ficha: `{ch.pdf_template or 'desconhecido'}`")
+                stats = import_stats(pdf_bytes)
+                if stats:
+                    peak = f" • pico {stats.peak_bytes / 1024:.0f} KB" if stats.peak_bytes else ""
+                    st.caption(f"⏱️ leitura {stats.mode}: {stats.seconds * 1000:.0f} ms{peak} • {stats.n_fields} campos")
+                if load_character(ch.id) is not None:
+                    st.warning("Este PDF já foi importado — salvar substitui a ficha existente.")
                 if st.button("✅ Salvar como nova ficha", use_container_width=True):
                     save_character(ch)
                     st.session_state["selected_char_id"] = ch.id
-                    log(f"📥 Importado PDF: **{ch.character_name}**")
+                    get_hub().add("📥", f"Importado PDF: **{ch.character_name}**")
                     st.rerun()
 
+        with st.expander("📦 Importar várias fichas (PDFs ou .zip)", expanded=False):
+            ups = st.file_uploader(
+                "Envie os PDFs (ou um .zip com eles)",
+                type=["pdf", "zip"],
+                accept_multiple_files=True,
+                key="pdf_batch_upload",
+            )
+            if ups and st.button("📥 Importar todas", use_container_width=True, key="pdf_batch_go"):
+                files = expand_uploads([(u.name, u.getvalue()) for u in ups])
+                bar = st.progress(0.0, text=f"0/{len(files)}")
+                imported: List[Character] = []
+                for i, res in enumerate(import_characters_from_pdfs(files), start=1):
+                    bar.progress(i / len(files), text=f"{i}/{len(files)} — {res.name}")
+                    if res.character is not None:
+                        imported.append(res.character)
+                        st.caption(f"✅ {res.name}: **{res.character.character_name}**")
+                    else:
+                        st.caption(f"❌ {res.name}: {res.error}")
+                if imported:
+                    save_characters(imported)
+                    get_hub().add("📦", f"Importadas {len(imported)} fichas de {len(files)} PDF(s)")
+                    st.success(f"{len(imported)} ficha(s) salvas.")
+
         st.divider()
 
-        ids = list_character_ids()
-        if not ids:
+        rows = list_character_summaries()
+        if not rows:
             st.info("Sem fichas ainda. Importe um PDF acima.")
         else:
-            for cid in ids:
-                ch = load_character(cid)
-                if not ch:
-                    continue
-
+            for row in rows:
+                cid = row["id"]
                 with st.container(border=True):
-                    img = _img_bytes_from_b64(getattr(ch, "portrait_b64", None))
+                    thumb = portrait_thumb_file(row.get("portrait"))
+                    img = str(thumb) if thumb else None
+                    if img is None and row.get("has_portrait"):
+                        # ficha antiga com foto em base64 (ver `python -m rpg migrate-portraits`)
+                        full = load_character(cid)
+                        img = _img_bytes_from_b64(full.portrait_b64) if full else None
                     if img:
                         st.image(img, use_container_width=True)
                     else:
                         st.caption("📷 Sem foto")
 
-                    st.markdown(f"**{ch.character_name}**")
-                    st.caption(ch.class_and_level or ch.species or "—")
+                    st.markdown(f"**{row['name']}**")
+                    st.caption(row.get("class_and_level") or row.get("species") or "—")
 
                     b1, b2 = st.columns(2)
                     if b1.button("➡️ Abrir", key=f"open_{cid}", use_container_width=True):
@@ -95,6 +131,173 @@ def render() -> None:
                             st.session_state["selected_char_id"] = None
                         st.rerun()
 
+
+@st.fragment
+def _notes_fragment(cid: str) -> None:
+    with timed("ficha.características"):
+        ch = load_character(cid)
+        if ch is None:
+            return
+
+        with st.expander("📚 Características (Raça / Antecedente / Classe)", expanded=False):
+            ch.race_notes_md = st.text_area("Raça / Legado (Markdown)", value=ch.race_notes_md or "", height=140, key=f"race_md_{ch.id}")
+            ch.background_notes_md = st.text_area("Antecedente / Proficiências (Markdown)", value=ch.background_notes_md or "", height=140, key=f"bg_md_{ch.id}")
+            ch.class_notes_md = st.text_area("Classe / Features (Markdown)", value=ch.class_notes_md or "", height=180, key=f"class_md_{ch.id}")
+
+            if st.button("💾 Salvar características", use_container_width=True, key=f"save_md_{ch.id}"):
+                save_character(ch)
+                st.success("Salvo.")
+
+        # modo leitura só é montado quando ligado (um expander fechado mandaria
+        # o markdown inteiro ao navegador a cada rerun do fragmento)
+        if st.toggle("📖 Ver características (modo leitura)", value=False, key=f"read_md_{ch.id}"):
+            with st.container(border=True):
+                render_sections(ch.id, [
+                    ("Raça / Legado", "race_notes_md", ch.race_notes_md),
+                    ("Antecedente", "background_notes_md", ch.background_notes_md),
+                    ("Classe", "class_notes_md", ch.class_notes_md),
+                ])
+
+
+@st.fragment
+def _rolls_fragment(cid: str) -> None:
+    with timed("ficha.rolagens"):
+        ch = load_character(cid)
+        if ch is None:
+            return
+        rng = session_rng(st.session_state)
+        log = get_hub()
+
+        def _roll(icon: str, label: str, detail: str, roll: Dict[str, Any]) -> None:
+            # sem st.rerun(): só este fragmento roda; o toast dá o resultado na hora
+            # e o fragmento do log pega a rolagem no próximo ciclo
+            st.toast(log.add(icon, label, detail, ch.character_name, roll).markdown())
+
+        # ATRIBUTOS (clicáveis)
+        with st.expander("🧬 Atributos (clique para rolar)", expanded=True):
+            abilities = [
+                ("STR", ch.str_score),
+                ("DEX", ch.dex_score),
+                ("CON", ch.con_score),
+                ("INT", ch.int_score),
+                ("WIS", ch.wis_score),
+                ("CHA", ch.cha_score),
+            ]
+            cols = st.columns(6)
+            for i, (abv, score) in enumerate(abilities):
+                mod = _ability_mod(score)
+                cols[i].markdown(f"**{abv}**  \n{score}")
+                if cols[i].button(f"{mod:+d}", key=f"ab_{abv}_{ch.id}", use_container_width=True):
+                    rr = roll_d20(bonus=mod, rng=rng)
+                    _roll("🧬", f"{abv} check", fmt_d20(rr), rr)
+
+        # SAVES (do PDF, prontos)
+        with st.expander("🛡️ Testes de Resistência (do PDF)", expanded=False):
+            if not ch.save_mods:
+                st.caption("Sem saves importados do PDF.")
+            else:
+                c = st.columns(6)
+                for i, abv in enumerate(["STR", "DEX", "CON", "INT", "WIS", "CHA"]):
+                    bonus = ch.save_mods.get(abv, 0)
+                    if c[i].button(f"{abv} {bonus:+d}", key=f"save_{abv}_{ch.id}", use_container_width=True):
+                        rr = roll_d20(bonus=bonus, rng=rng)
+                        _roll("🛡️", f"Save {abv}", fmt_d20(rr), rr)
+
+        # SKILLS (do PDF, prontos)
+        with st.expander("🎯 Perícias (do PDF)", expanded=False):
+            if not ch.skill_mods:
+                st.caption("Sem perícias importadas do PDF.")
+            else:
+                # ordem alfabética garantida pelo modelo (Character._skills_in_order)
+                for skill, bonus in ch.skill_mods.items():
+                    if st.button(f"{skill} {bonus:+d}", key=f"skill_{skill}_{ch.id}", use_container_width=True):
+                        rr = roll_d20(bonus=bonus, rng=rng)
+                        _roll("🎯", skill, fmt_d20(rr), rr)
+
+        # ATAQUES
+        with st.expander("⚔️ Ataques (roláveis)", expanded=False):
+            if not ch.weapons:
+                st.caption("Sem armas importadas.")
+            for w in ch.weapons:
+                row = st.columns([0.52, 0.24, 0.24])
+                try:
+                    ds = describe(w.damage)
+                except DiceError as e:
+                    row[0].markdown(f"**{w.name}**  \nDano: `{w.damage}`")
+                    row[0].caption(f"⚠️ {e}")
+                    continue
+                row[0].markdown(
+                    f"**{w.name}**  \nDano: `{w.damage}` "
+                    f"(média {ds['mean']:.1f} • {ds['min']}–{ds['max']} • 90%: {ds['p90']})"
+                )
+                if row[1].button(f"🎯 Ataque +{w.attack_bonus}", key=f"atk_{ch.id}_{w.name}", use_container_width=True):
+                    rr = roll_d20(bonus=w.attack_bonus, rng=rng)
+                    _roll("🎯", w.name, fmt_d20(rr), rr)
+                if row[2].button("💥 Dano", key=f"dmg_{ch.id}_{w.name}", use_container_width=True):
+                    dr = roll_expr(w.damage, rng=rng)
+                    _roll("💥", f"Dano {w.name}", fmt_expr(dr), dr)
+
+
+@st.fragment
+def _pdf_fields_fragment(cid: str) -> None:
+    with timed("ficha.campos_pdf"):
+        ch = load_character(cid)
+        if ch is None:
+            return
+
+        with st.expander("📄 Campos do PDF (100%) — busca", expanded=False):
+            q = st.text_input("Filtrar por texto (campo ou valor)", value="", key=f"pdf_filter_{ch.id}")
+            items = list(ch.raw_pdf_fields.items()) if ch.raw_pdf_fields else []
+            if q.strip():
+                qq = q.strip().lower()
+                items = [(k, v) for (k, v) in items if qq in k.lower() or qq in (v or "").lower()]
+
+            st.caption(f"Mostrando {len(items)} campos.")
+            data = [{"campo": k, "valor": v} for k, v in items[:500]]
+            st.dataframe(data, use_container_width=True, hide_index=True)
+
+
+@st.fragment(run_every=LOG_POLL or None)
+def _log_fragment() -> None:
+    with timed("ficha.log"):
+        rng = session_rng(st.session_state)
+        # log compartilhado: todos os jogadores (e o mestre) veem as mesmas rolagens
+        log = get_hub()
+
+        st.markdown("### 📜 Log")
+        if st.button("Limpar log", use_container_width=True):
+            log.clear()
+
+        with st.expander("🎲 Semente (replay)", expanded=False):
+            st.caption(f"Semente atual: `{rng.seed}` • {rng.draws} dados rolados")
+            seed = st.number_input("Nova semente", min_value=0, value=int(rng.seed), step=1, key="rng_seed_in")
+            if st.button("Usar semente", use_container_width=True, key="rng_seed_set"):
+                st.session_state["rng"] = DiceRNG(int(seed))
+                log.add("🎲", f"Nova semente: `{int(seed)}`")
+                st.rerun(scope="fragment")
+
+        render_table_log(log, "log")
+    render_timings("ficha.")
+
+
+def render() -> None:
+    with timed("ficha.página"):
+        _render()
+
+
+def _render() -> None:
+    st.markdown("## 🧾 Ficha + Rolagens (clicáveis)")
+
+    if "selected_char_id" not in st.session_state:
+        st.session_state["selected_char_id"] = None
+
+    # coluna 1 = roster/import | coluna 2 = ficha | coluna 3 = log
+    col_roster, col_sheet, col_log = st.columns([0.23, 0.52, 0.25], gap="large")
+
+    # ====== ROSTER / IMPORT ======
+    with col_roster:
+        _roster_fragment()
+
     # ====== FICHA ======
     with col_sheet:
         cid = st.session_state.get("selected_char_id")
@@ -126,13 +329,14 @@ def render() -> None:
             with st.expander("🖼️ Foto do jogador/personagem", expanded=False):
                 up_img = st.file_uploader("Enviar imagem (png/jpg)", type=["png", "jpg", "jpeg"], key=f"img_{ch.id}")
                 if up_img is not None:
-                    b = up_img.getvalue()
-                    ch.portrait_b64 = base64.b64encode(b).decode("utf-8")
+                    ch.portrait_path = put_portrait(up_img.getvalue())
+                    ch.portrait_b64 = None
                     save_character(ch)
                     st.success("Foto salva na ficha.")
                     st.rerun()
 
-                img = _img_bytes_from_b64(ch.portrait_b64)
+                pf = portrait_file(ch.portrait_path)
+                img = str(pf) if pf else _img_bytes_from_b64(ch.portrait_b64)
                 if img:
                     st.image(img, use_container_width=True)
 
@@ -150,88 +354,10 @@ def render() -> None:
                     st.caption("—")
 
             # CARACTERÍSTICAS (MD)
-            with st.expander("📚 Características (Raça / Antecedente / Classe)", expanded=False):
-                ch.race_notes_md = st.text_area("Raça / Legado (Markdown)", value=ch.race_notes_md or "", height=140, key=f"race_md_{ch.id}")
-                ch.background_notes_md = st.text_area("Antecedente / Proficiências (Markdown)", value=ch.background_notes_md or "", height=140, key=f"bg_md_{ch.id}")
-                ch.class_notes_md = st.text_area("Classe / Features (Markdown)", value=ch.class_notes_md or "", height=180, key=f"class_md_{ch.id}")
+            _notes_fragment(ch.id)
 
-                if st.button("💾 Salvar características", use_container_width=True, key=f"save_md_{ch.id}"):
-                    save_character(ch)
-                    st.success("Salvo.")
-                    st.rerun()
-
-            with st.expander("📖 Ver características (modo leitura)", expanded=False):
-                if ch.race_notes_md.strip():
-                    st.markdown("### Raça / Legado")
-                    st.markdown(ch.race_notes_md)
-                if ch.background_notes_md.strip():
-                    st.markdown("### Antecedente")
-                    st.markdown(ch.background_notes_md)
-                if ch.class_notes_md.strip():
-                    st.markdown("### Classe")
-                    st.markdown(ch.class_notes_md)
-                if not (ch.race_notes_md.strip() or ch.background_notes_md.strip() or ch.class_notes_md.strip()):
-                    st.caption("—")
-
-            # ATRIBUTOS (clicáveis)
-            with st.expander("🧬 Atributos (clique para rolar)", expanded=True):
-                abilities = [
-                    ("STR", ch.str_score),
-                    ("DEX", ch.dex_score),
-                    ("CON", ch.con_score),
-                    ("INT", ch.int_score),
-                    ("WIS", ch.wis_score),
-                    ("CHA", ch.cha_score),
-                ]
-                cols = st.columns(6)
-                for i, (abv, score) in enumerate(abilities):
-                    mod = _ability_mod(score)
-                    cols[i].markdown(f"**{abv}**  \n{score}")
-                    if cols[i].button(f"{mod:+d}", key=f"ab_{abv}_{ch.id}", use_container_width=True):
-                        rr = roll_d20(bonus=mod)
-                        log(f"🧬 **{ch.character_name}** — {abv} check: {fmt_d20(rr)}")
-                        st.rerun()
-
-            # SAVES (do PDF, prontos)
-            with st.expander("🛡️ Testes de Resistência (do PDF)", expanded=False):
-                if not ch.save_mods:
-                    st.caption("Sem saves importados do PDF.")
-                else:
-                    c = st.columns(6)
-                    for i, abv in enumerate(["STR", "DEX", "CON", "INT", "WIS", "CHA"]):
-                        bonus = ch.save_mods.get(abv, 0)
-                        if c[i].button(f"{abv} {bonus:+d}", key=f"save_{abv}_{ch.id}", use_container_width=True):
-                            rr = roll_d20(bonus=bonus)
-                            log(f"🛡️ **{ch.character_name}** — Save {abv}: {fmt_d20(rr)}")
-                            st.rerun()
-
-            # SKILLS (do PDF, prontos)
-            with st.expander("🎯 Perícias (do PDF)", expanded=False):
-                if not ch.skill_mods:
-                    st.caption("Sem perícias importadas do PDF.")
-                else:
-                    items = sorted(ch.skill_mods.items(), key=lambda x: x[0].lower())
-                    for skill, bonus in items:
-                        if st.button(f"{skill} {bonus:+d}", key=f"skill_{skill}_{ch.id}", use_container_width=True):
-                            rr = roll_d20(bonus=bonus)
-                            log(f"🎯 **{ch.character_name}** — {skill}: {fmt_d20(rr)}")
-                            st.rerun()
-
-            # ATAQUES
-            with st.expander("⚔️ Ataques (roláveis)", expanded=False):
-                if not ch.weapons:
-                    st.caption("Sem armas importadas.")
-                for w in ch.weapons:
-                    row = st.columns([0.52, 0.24, 0.24])
-                    row[0].markdown(f"**{w.name}**  \nDano: `{w.damage}`")
-                    if row[1].button(f"🎯 Ataque +{w.attack_bonus}", key=f"atk_{ch.id}_{w.name}", use_container_width=True):
-                        rr = roll_d20(bonus=w.attack_bonus)
-                        log(f"🎯 **{ch.character_name}** — {w.name}: {fmt_d20(rr)}")
-                        st.rerun()
-                    if row[2].button("💥 Dano", key=f"dmg_{ch.id}_{w.name}", use_container_width=True):
-                        dr = roll_expr(w.damage)
-                        log(f"💥 **{ch.character_name}** — Dano {w.name}: {fmt_expr(dr)}")
-                        st.rerun()
+            # ATRIBUTOS / SAVES / PERÍCIAS / ATAQUES (clicáveis)
+            _rolls_fragment(ch.id)
 
             # EQUIPAMENTOS
             with st.expander("🎒 Equipamentos", expanded=False):
@@ -268,23 +394,8 @@ def render() -> None:
                     st.caption("Sem magias preenchidas no PDF.")
 
             # DUMP COMPLETO DO PDF
-            with st.expander("📄 Campos do PDF (100%) — busca", expanded=False):
-                q = st.text_input("Filtrar por texto (campo ou valor)", value="", key=f"pdf_filter_{ch.id}")
-                items = list(ch.raw_pdf_fields.items()) if ch.raw_pdf_fields else []
-                if q.strip():
-                    qq = q.strip().lower()
-                    items = [(k, v) for (k, v) in items if qq in k.lower() or qq in (v or "").lower()]
-
-                st.caption(f"Mostrando {len(items)} campos.")
-                data = [{"campo": k, "valor": v} for k, v in items[:500]]
-                st.dataframe(data, use_container_width=True, hide_index=True)
+            _pdf_fields_fragment(ch.id)
 
     # ====== LOG ======
     with col_log:
-        st.markdown("### 📜 Log")
-        if st.button("Limpar log", use_container_width=True):
-            st.session_state["log"] = []
-            st.rerun()
-
-        for line in st.session_state["log"][:250]:
-            st.markdown(line)
+        _log_fragment()
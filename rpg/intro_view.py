@@ -1,22 +1,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import base64
-from pathlib import Path
-
 import streamlit as st
-import streamlit.components.v1 as components
-
-ASSETS_DIR = Path(__file__).resolve().parents[1] / "assets"
 
-PHOTO_CANDIDATES = [
-    ASSETS_DIR / "foto1.jpg",
-    ASSETS_DIR / "foto1.jpeg",
-    ASSETS_DIR / "foto1.png",
-]
-
-VIDEO_PATH = ASSETS_DIR / "video1.mp4"
-MUSIC_PATH = ASSETS_DIR / "musica1.mp4"
+from rpg.assets import asset
+from rpg.media_server import media_url
 
 INTRO_TEXT = """# 📜 Prólogo: A Sombra da Vitória
 
@@ -46,43 +34,25 @@ Vocês estão a poucos metros da Tenda de Comando. O acampamento ao redor é bar
 """
 
 
-def _find_photo() -> Path | None:
-    for p in PHOTO_CANDIDATES:
-        if p.exists():
-            return p
-    return None
-
-
-def _audio_player_mp4_autoplay(file_path: Path) -> None:
-    # Player sem título, só o controle
-    data = file_path.read_bytes()
-    b64 = base64.b64encode(data).decode("utf-8")
-    html = f"""
-    <div style="border:1px solid #ff2b2b; border-radius:12px; padding:10px; background:#0f0f0f;">
-      <audio controls autoplay style="width: 100%;">
-        <source src="data:audio/mp4;base64,{b64}" type="audio/mp4">
-      </audio>
-    </div>
-    """
-    components.html(html, height=90)
-
-
 def render() -> None:
-    ASSETS_DIR.mkdir(parents=True, exist_ok=True)
-
     st.markdown(INTRO_TEXT)
     st.divider()
 
     col1, col2 = st.columns([0.62, 0.38], gap="large")
 
     with col1:
-        photo = _find_photo()
+        # versões para web do manifesto (python -m rpg build-assets), resolvidas uma vez por processo
+        photo = asset("intro_photo")
         if photo:
-            st.image(photo, use_container_width=True)
+            st.image(str(photo), use_container_width=True)
 
-        if VIDEO_PATH.exists():
-            st.video(VIDEO_PATH.read_bytes())
+        video = asset("intro_video")
+        if video:
+            # padrão: o caminho deixa o Streamlit servir o arquivo por /media (mesma origem);
+            # com RPG_MEDIA_SERVER=1, URL do servidor de mídia (streaming com Range)
+            st.video(media_url(video) or str(video))
 
     with col2:
-        if MUSIC_PATH.exists():
-            _audio_player_mp4_autoplay(MUSIC_PATH)
+        if asset("intro_music"):
+            # a música toca no player da barra lateral (cena "intro"), que segue tocando nas outras páginas
+            st.caption("🎵 Trilha da introdução: controles na barra lateral.")
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+import streamlit as st
+
+MAX_ENTRIES = 256
+# RPG_MD_PREPARE=1 converte bullets/quebras do texto importado do PDF; sem ele o
+# markdown guardado é mostrado exatamente como está
+PREPARE = os.environ.get("RPG_MD_PREPARE") == "1"
+
+_BULLETS = ("•", "◦", "▪", "●", "‣")
+_BLOCK = re.compile(r"^\s*(#{1,6}\s|[-*+]\s|\d+[.)]\s|\||>)")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+def digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _prepare(text: str) -> str:
+    """
+    Texto importado do PDF -> markdown: bullets (•, ◦, ...) viram itens de lista e
+    quebras de linha simples viram quebras de verdade (o markdown juntaria tudo
+    num parágrafo só). Blocos de código ficam como estão.
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    out = []
+    fenced = False
+    for line in lines:
+        if _FENCE.match(line):
+            fenced = not fenced
+            out.append(line)
+            continue
+        if fenced:
+            out.append(line)
+            continue
+        s = line.rstrip()
+        t = s.lstrip()
+        if t[:1] in _BULLETS:
+            s = s[: len(s) - len(t)] + "- " + t[1:].lstrip()
+        out.append(s)
+
+    fenced = False
+    for i, line in enumerate(out[:-1]):
+        if _FENCE.match(line):
+            fenced = not fenced
+            continue
+        nxt = out[i + 1]
+        if fenced or not line.strip() or not nxt.strip():
+            continue
+        if line.lstrip().startswith(("#", "|")) or _BLOCK.match(nxt) or _FENCE.match(nxt):
+            continue
+        out[i] = line + "  "
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(out)).strip()
+
+
+def rendered(owner: str, field: str, text: str) -> str:
+    """
+    Markdown de um campo. Sem RPG_MD_PREPARE=1 é o próprio texto (nada a
+    cachear); com ele, cache de processo por (dono, campo, hash do conteúdo):
+    só o campo que mudou é preparado de novo.
+    """
+    if not PREPARE:
+        return text
+    key = (owner, field, digest(text))
+    with _lock:
+        md = _cache.get(key)
+        if md is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return md
+    md = _prepare(text) if PREPARE else text
+    with _lock:
+        _stats["misses"] += 1
+        _cache[key] = md
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return md
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {**_stats, "entries": len(_cache)}
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
+
+
+def render_sections(owner: str, sections: Iterable[Tuple[str, str, str]]) -> None:
+    """(título, campo, texto) -> um st.markdown por seção não vazia; '—' se não houver nenhuma."""
+    shown = False
+    for title, field, text in sections:
+        if not text or not text.strip():
+            continue
+        st.markdown(f"### {title}\n\n{rendered(owner, field, text)}")
+        shown = True
+    if not shown:
+        st.caption("—")
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import email.utils
+import mimetypes
+import os
+import shutil
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+import streamlit as st
+
+from .storage import DATA_DIR
+
+ASSETS_DIR = Path(__file__).resolve().parents[1] / "assets"
+MEDIA_DIR = DATA_DIR / "media"
+# ./static ao lado do app.py: o Streamlit serve em app/static/ com server.enableStaticServing
+STATIC_MEDIA_DIR = Path(__file__).resolve().parents[1] / "static" / "media"
+
+# prefixo da URL -> pasta servida
+ROOTS: Dict[str, Path] = {
+    "media": MEDIA_DIR,
+    "assets": ASSETS_DIR,
+}
+
+CHUNK = 256 * 1024
+
+_LOOPBACK = ("127.0.0.1", "localhost", "::1", "[::1]")
+
+mimetypes.add_type("audio/mp4", ".m4a")
+mimetypes.add_type("audio/ogg", ".ogg")
+mimetypes.add_type("audio/ogg", ".opus")
+mimetypes.add_type("video/webm", ".webm")
+mimetypes.add_type("image/webp", ".webp")
+
+
+def _etag(st_: os.stat_result) -> str:
+    return f'"{st_.st_size:x}-{st_.st_mtime_ns:x}"'
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """'bytes=a-b' | 'bytes=a-' | 'bytes=-n' -> (início, fim inclusivo); só um intervalo."""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    a, _, b = spec.strip().partition("-")
+    if a == "":
+        n = int(b)
+        if n <= 0:
+            return None
+        return max(0, size - n), size - 1
+    start = int(a)
+    end = int(b) if b else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "rpg-media/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args) -> None:  # silencioso (o Streamlit já loga bastante)
+        pass
+
+    def _resolve(self) -> Optional[Path]:
+        parts = unquote(urlsplit(self.path).path).lstrip("/").split("/", 1)
+        if len(parts) != 2 or parts[0] not in ROOTS:
+            return None
+        root = ROOTS[parts[0]].resolve()
+        p = (root / parts[1]).resolve()
+        if root not in p.parents or not p.is_file():
+            return None
+        return p
+
+    def _send_empty(self, status: HTTPStatus, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self) -> None:
+        self._serve(head=True)
+
+    def do_GET(self) -> None:
+        self._serve(head=False)
+
+    def _serve(self, head: bool) -> None:
+        path = self._resolve()
+        if path is None:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+        stat = path.stat()
+        size = stat.st_size
+        etag = _etag(stat)
+        versioned = "v=" in (urlsplit(self.path).query or "")
+        common = {
+            "ETag": etag,
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            # URL com ?v=<etag> muda quando o arquivo muda: pode ficar no cache para sempre
+            "Cache-Control": "public, max-age=31536000, immutable" if versioned else "public, max-age=3600",
+        }
+
+        if etag in (self.headers.get("If-None-Match") or ""):
+            self._send_empty(HTTPStatus.NOT_MODIFIED, common)
+            return
+
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+        rng = self.headers.get("Range")
+        if rng and size > 0:
+            try:
+                parsed = _parse_range(rng, size)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                self._send_empty(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, {"Content-Range": f"bytes */{size}"})
+                return
+            start, end = parsed
+            status = HTTPStatus.PARTIAL_CONTENT
+
+        length = max(0, end - start + 1)
+        self.send_response(status)
+        for k, v in common.items():
+            self.send_header(k, v)
+        self.send_header("Content-Type", mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        if status == HTTPStatus.PARTIAL_CONTENT:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head:
+            return
+
+        try:
+            with path.open("rb") as f:
+                f.seek(start)
+                left = length
+                while left > 0:
+                    chunk = f.read(min(CHUNK, left))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    left -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # o navegador cancelou (seek no player)
+
+
+class _MediaServer:
+    def __init__(self, httpd: ThreadingHTTPServer):
+        self.httpd = httpd
+        self.port = httpd.server_address[1]
+        self.thread = threading.Thread(target=httpd.serve_forever, name="rpg-media", daemon=True)
+        self.thread.start()
+
+
+_server: Optional[_MediaServer] = None
+_server_lock = threading.Lock()
+_failed = False
+
+
+def ensure_media_server() -> Optional[_MediaServer]:
+    """
+    Sobe (uma vez por processo) o servidor de mídia com Range/ETag/Cache-Control.
+    Opcional: só com RPG_MEDIA_SERVER=1 (sem ele o Streamlit serve os arquivos pela
+    mesma origem). RPG_MEDIA_PORT (padrão 8765, ocupada -> porta livre) e
+    RPG_MEDIA_BIND (padrão 127.0.0.1) controlam onde ele escuta.
+    """
+    global _server, _failed
+    if _server is not None or _failed or os.environ.get("RPG_MEDIA_SERVER", "0") != "1":
+        return _server
+    with _server_lock:
+        if _server is None and not _failed:
+            bind = os.environ.get("RPG_MEDIA_BIND", _LOOPBACK[0])
+            port = int(os.environ.get("RPG_MEDIA_PORT", "8765"))
+            httpd = None
+            for p in (port, 0):
+                try:
+                    httpd = ThreadingHTTPServer((bind, p), _Handler)
+                    break
+                except OSError:
+                    continue
+            if httpd is None:
+                _failed = True
+                return None
+            httpd.daemon_threads = True
+            _server = _MediaServer(httpd)
+    return _server
+
+
+def _request_host() -> str:
+    # o navegador chega no servidor de mídia pelo mesmo host que usou para abrir o app
+    ctx = getattr(st, "context", None)
+    try:
+        host = (ctx.headers.get("Host") or "") if ctx is not None else ""
+    except Exception:
+        host = ""
+    host = host.rsplit(":", 1)[0] if host and not host.endswith("]") else host
+    return host or "localhost"
+
+
+def _request_is_https() -> bool:
+    ctx = getattr(st, "context", None)
+    if ctx is None:
+        return False
+    try:
+        url = getattr(ctx, "url", None) or ""
+        proto = ctx.headers.get("X-Forwarded-Proto") or ""
+    except Exception:
+        return False
+    return url.startswith("https:") or proto.lower() == "https"
+
+
+def _direct_base(srv: _MediaServer) -> Optional[str]:
+    """http://host:porta do servidor, se o navegador consegue chegar nele sem proxy."""
+    if _request_is_https():
+        return None  # http:// numa página https é bloqueado (mixed content)
+    host = _request_host()
+    bind = srv.httpd.server_address[0]
+    if bind in _LOOPBACK and host not in _LOOPBACK:
+        return None  # escutando só na máquina local; o navegador está em outra
+    return f"http://{host}:{srv.port}"
+
+
+def media_url(path: Path) -> Optional[str]:
+    """
+    URL do arquivo (dentro de data/media ou assets) no servidor de mídia, com
+    ?v=<etag> para cache longo. None se o servidor estiver desligado, inacessível
+    para este navegador ou o arquivo estiver fora das pastas servidas — aí quem
+    chama usa o caminho e o Streamlit serve o arquivo pela mesma origem.
+    """
+    path = Path(path).resolve()
+    for prefix, root in ROOTS.items():
+        root = root.resolve()
+        if root in path.parents:
+            rel = path.relative_to(root).as_posix()
+            break
+    else:
+        return None
+    if not path.is_file():
+        return None
+    srv = ensure_media_server()
+    if srv is None:
+        return None
+    # RPG_MEDIA_URL: endereço público do servidor de mídia (ex.: atrás de um proxy)
+    base = os.environ.get("RPG_MEDIA_URL", "").rstrip("/") or _direct_base(srv)
+    if not base:
+        return None
+    return f"{base}/{prefix}/{quote(rel)}?v={_etag(path.stat()).strip(chr(34))}"
+
+
+def static_enabled() -> bool:
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+
+def static_url(path: Path) -> Optional[str]:
+    """
+    URL relativa (mesma origem) do arquivo pelo static serving do Streamlit. O
+    arquivo é publicado uma vez em static/media com tamanho+mtime no nome
+    (hardlink; cópia se não der — o Streamlit não segue symlink para fora de
+    static/), então a URL muda quando ele muda. None se o static serving estiver
+    desligado.
+    """
+    path = Path(path)
+    if not static_enabled() or not path.is_file():
+        return None
+    st_ = path.stat()
+    name = f"{st_.st_size:x}-{st_.st_mtime_ns:x}-{path.name}"
+    dst = STATIC_MEDIA_DIR / name
+    if not dst.exists():
+        try:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(f".{os.getpid()}-{threading.get_ident()}-{name}")
+            try:
+                os.link(path, tmp)
+            except OSError:
+                shutil.copyfile(path, tmp)
+            tmp.replace(dst)
+        except OSError:
+            return None
+    return f"app/static/media/{quote(name)}"
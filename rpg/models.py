@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 
 
 class Weapon(BaseModel):
@@ -81,6 +81,13 @@ class Character(BaseModel):
 
     # ✅ Dump 100% dos campos do PDF (pra nada se perder)
     raw_pdf_fields: Dict[str, str] = Field(default_factory=dict)
+    pdf_template: str = ""   # layout reconhecido na importação ("wotc_en", "pt_br", ...)
+
+    @field_validator("skill_mods")
+    @classmethod
+    def _skills_in_order(cls, v: Dict[str, int]) -> Dict[str, int]:
+        # ordem alfabética garantida para qualquer ficha (importada, antiga ou editada à mão)
+        return dict(sorted(v.items(), key=lambda x: x[0].lower()))
 
 
 class MonsterAction(BaseModel):
@@ -106,6 +113,7 @@ class Monster(BaseModel):
     ac: int = 12
     max_hp: int = 7
     current_hp: int = 7
+    hit_dice: str = ""                 # ex: "4d8+4" (opcional; usado para rolar HP de grupos)
     speed: str = "30 ft."
 
     str_score: int = Field(10, ge=1, le=30)
@@ -124,3 +132,55 @@ class Monster(BaseModel):
     traits_md: str = ""
     actions: List[MonsterAction] = Field(default_factory=list)
     notes_md: str = ""
+
+
+class Combatant(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    name: str
+    kind: str = "custom"               # "character" | "monster" | "custom"
+    ref_id: Optional[str] = None       # id da ficha/monstro de origem
+    group_id: Optional[str] = None     # membro de um MonsterGroup (HP/condições ficam no grupo)
+    slot: int = 0                      # posição do membro nos arrays do grupo
+
+    init_bonus: int = 0
+    initiative: Optional[int] = None   # None = ainda não rolou (vai pro fim da fila)
+    tiebreak: float = 0.0              # desempate (ex.: bônus de DEX)
+    seq: int = 0                       # ordem de entrada (desempate final, estável)
+
+    ac: Optional[int] = None
+    max_hp: Optional[int] = None
+    hp: Optional[int] = None
+    conditions: List[str] = Field(default_factory=list)
+
+
+class MonsterGroup(BaseModel):
+    """Várias cópias do mesmo monstro: HP e condições em arrays paralelos (um item por membro)."""
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    name: str
+    ref_id: Optional[str] = None       # id do Monster de origem
+    ac: int = 10
+    init_bonus: int = 0
+
+    max_hp: List[int] = Field(default_factory=list)
+    hp: List[int] = Field(default_factory=list)
+    conditions: List[int] = Field(default_factory=list)   # bitmask (ver encounter.CONDITIONS)
+
+
+class Encounter(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    name: str = "Encontro"
+    round: int = 1
+    turn_id: Optional[str] = None      # de quem é a vez
+    seed: int = 0                      # semente das rolagens do encontro
+    rng_step: int = 0                  # fluxos já usados da semente (cada rolagem sem rng avança)
+    next_seq: int = 0
+
+    combatants: Dict[str, Combatant] = Field(default_factory=dict)
+    groups: Dict[str, MonsterGroup] = Field(default_factory=dict)
+    order: List[str] = Field(default_factory=list)   # ids na ordem de iniciativa
@@ -6,12 +6,16 @@ import streamlit as st
 from rpg.models import Monster, MonsterAction
 from rpg.storage import (
     ensure_dirs,
-    list_monster_ids,
+    list_monster_summaries,
     load_monster,
     save_monster,
     delete_monster,
 )
-from rpg.dice import roll_d20, roll_expr, critify, fmt_d20, fmt_expr
+from rpg.dice import DiceError, roll_d20, roll_expr, roll_attacks_many, compile_expr, fmt_d20, fmt_expr
+from rpg.dice_dist import attack_odds, expected_attack_damage
+from rpg.perf import render_timings, timed
+from rpg.rng import session_rng
+from rpg.roll_log import LOG_POLL, render_log, session_log
 
 ensure_dirs()
 
@@ -48,6 +52,7 @@ def _sample_monster() -> Monster:
         ac=15,
         max_hp=22,
         current_hp=22,
+        hit_dice="4d8+4",
         speed="30 ft.",
         str_score=13,
         dex_score=14,
@@ -80,7 +85,174 @@ def _sample_monster() -> Monster:
     )
 
 
+def _damage_error(expr: str) -> str:
+    """Mensagem de erro da fórmula de dano ("" se for válida ou vazia)."""
+    try:
+        compile_expr(expr or "")
+    except DiceError as e:
+        return str(e)
+    return ""
+
+
+@st.fragment
+def _actions_fragment(monster_id: str) -> None:
+    with timed("monstros.ações"):
+        m = load_monster(monster_id)
+        if m is None:
+            return
+        rng = session_rng(st.session_state)
+        mlog = session_log(st.session_state, "m_log")
+
+        def _add(*args) -> None:
+            # sem st.rerun(): só este fragmento roda; o log pega a rolagem no próximo ciclo
+            st.toast(mlog.add(*args).markdown())
+
+        with st.expander("⚔️ Ações (roláveis)", expanded=True):
+            adv = st.session_state.get("m_adv", False)
+            dis = st.session_state.get("m_dis", False)
+            target_ac = st.session_state.get("m_ac", 0)
+            auto_damage = st.session_state.get("m_autodmg", True)
+
+            for i, act in enumerate(m.actions):
+                r = st.columns([0.55, 0.18, 0.27])
+                label = act.name
+                if act.damage:
+                    label += f" — {act.damage} {act.damage_type}".strip()
+
+                r[0].write(f"**{label}**")
+                if act.description:
+                    r[0].caption(act.description)
+                bad = _damage_error(act.damage)
+                if bad:
+                    r[0].caption(f"⚠️ {bad}")
+                elif act.damage:
+                    ev = expected_attack_damage(int(act.to_hit or 0), act.damage, int(target_ac), adv, dis)
+                    r[0].caption(
+                        f"🎲 acerto {ev['p_hit']:.0%} • crit {ev['p_crit']:.0%} • "
+                        f"dano médio/ataque {ev['expected_damage']:.1f} (no acerto {ev['mean_on_hit']:.1f})"
+                    )
+                elif act.to_hit is not None:
+                    odds = attack_odds(int(act.to_hit), int(target_ac), adv, dis)
+                    r[0].caption(f"🎲 acerto {odds['p_hit']:.0%} • crit {odds['p_crit']:.0%}")
+
+                if r[1].button("🎯 Ataque", key=f"m_atk_{m.id}_{i}", use_container_width=True):
+                    to_hit = int(act.to_hit or 0)
+                    rr = roll_d20(bonus=to_hit, advantage=adv, disadvantage=dis, rng=rng)
+                    nat = rr["chosen"]
+                    total = rr["total"]
+
+                    if nat == 1:
+                        outcome = "❌ MISS (nat 1)"
+                        hit = False
+                        crit = False
+                    elif nat == 20:
+                        outcome = "💥 CRIT (nat 20)"
+                        hit = True
+                        crit = True
+                    else:
+                        if target_ac and total >= int(target_ac):
+                            outcome = f"✅ HIT vs AC {int(target_ac)}"
+                            hit = True
+                            crit = False
+                        elif target_ac:
+                            outcome = f"❌ MISS vs AC {int(target_ac)}"
+                            hit = False
+                            crit = False
+                        else:
+                            outcome = "🎲 Rolado (sem AC)"
+                            hit = True
+                            crit = False
+
+                    _add("👹", act.name, f"{fmt_d20(rr)} → {outcome}", m.name, rr)
+
+                    if hit and auto_damage and act.damage and not bad:
+                        dmg = compile_expr(act.damage)
+                        dr = roll_expr(dmg.crit() if crit else dmg, rng=rng)
+                        tag = " (CRIT dmg)" if crit else ""
+                        _add("💥", f"Dano {act.name}{tag}", fmt_expr(dr), m.name, dr)
+
+                if r[2].button("💥 Dano", key=f"m_dmg_{m.id}_{i}", use_container_width=True):
+                    if not act.damage or bad:
+                        _add("ℹ️", act.name, bad or "sem fórmula de dano.", m.name)
+                    else:
+                        dr = roll_expr(act.damage, rng=rng)
+                        _add("💥", f"Dano {act.name}", fmt_expr(dr), m.name, dr)
+
+        attacks = [(i, a) for i, a in enumerate(m.actions) if a.to_hit is not None and not _damage_error(a.damage)]
+        if attacks:
+            with st.expander("🗡️ Ataque em horda", expanded=False):
+                h = st.columns([0.5, 0.25, 0.25])
+                ai = h[0].selectbox(
+                    "Ação",
+                    [i for i, _ in attacks],
+                    format_func=lambda i: m.actions[i].name,
+                    key=f"m_horde_act_{m.id}",
+                )
+                n_atk = h[1].number_input("Atacantes", 1, 1000, value=10, step=1, key=f"m_horde_n_{m.id}")
+                h_ac = h[2].number_input(
+                    "AC do alvo", 0, 40, value=int(st.session_state.get("m_ac", 0)), step=1, key=f"m_horde_ac_{m.id}"
+                )
+                if st.button("⚔️ Resolver ataques", key=f"m_horde_go_{m.id}", use_container_width=True):
+                    act = m.actions[ai]
+                    res = roll_attacks_many(
+                        int(act.to_hit or 0),
+                        act.damage,
+                        int(n_atk),
+                        ac=int(h_ac),
+                        advantage=st.session_state.get("m_adv", False),
+                        disadvantage=st.session_state.get("m_dis", False),
+                        rng=rng,
+                        roll_damage=st.session_state.get("m_autodmg", True),
+                    )
+                    vs = f"vs AC {int(h_ac)}" if h_ac else "sem AC"
+                    dmg = f" • 💥 dano total **{res['total_damage']}**" if act.damage else ""
+                    _add(
+                        "🗡️",
+                        f"{act.name} {vs}",
+                        f"✅ {res['hits']} acertos (💥 {res['crits']} crit) • ❌ {res['n'] - res['hits']} erros{dmg}",
+                        f"{m.name} ×{res['n']}",
+                        {k: res[k] for k in ("type", "n", "bonus", "ac", "chosen", "hit", "crit", "damage", "hits", "crits", "total_damage")},
+                    )
+                    st.session_state["m_horde_last"] = {
+                        "title": f"{m.name} ×{res['n']} — {act.name} {vs}",
+                        "rows": [
+                            {
+                                "#": k + 1,
+                                "d20": " / ".join(str(x) for x in res["rolls"][k].tolist()),
+                                "Total": int(res["totals"][k]),
+                                "Resultado": "💥 CRIT" if res["crit"][k] else ("✅ HIT" if res["hit"][k] else "❌ MISS"),
+                                "Dano": int(res["damage"][k]),
+                            }
+                            for k in range(res["n"])
+                        ],
+                    }
+
+
+@st.fragment(run_every=LOG_POLL or None)
+def _log_fragment() -> None:
+    with timed("monstros.log"):
+        mlog = session_log(st.session_state, "m_log")
+
+        st.markdown("### 📜 Log (Monstros)")
+        if st.button("Limpar log", use_container_width=True, key="m_clear"):
+            mlog.clear()
+            st.session_state.pop("m_horde_last", None)
+
+        last = st.session_state.get("m_horde_last")
+        if last:
+            with st.expander(f"🔎 Detalhes: {last['title']}", expanded=False):
+                st.dataframe(last["rows"], hide_index=True, use_container_width=True)
+
+        render_log(mlog, "m_log")
+    render_timings("monstros.")
+
+
 def render() -> None:
+    with timed("monstros.página"):
+        _render()
+
+
+def _render() -> None:
     if not _require_password():
         return
 
@@ -90,12 +262,6 @@ def render() -> None:
         st.session_state["monsters_authed"] = False
         st.rerun()
 
-    if "m_log" not in st.session_state:
-        st.session_state["m_log"] = []
-
-    def mlog(line: str) -> None:
-        st.session_state["m_log"].insert(0, line)
-
     with st.expander("🎲 Regras rápidas (Monstros)", expanded=False):
         adv = st.checkbox("Vantagem", value=False, key="m_adv")
         dis = st.checkbox("Desvantagem", value=False, key="m_dis")
@@ -142,18 +308,15 @@ def render() -> None:
 
         st.divider()
 
-        ids = list_monster_ids()
-        if not ids:
+        rows = list_monster_summaries()
+        if not rows:
             st.info("Sem monstros ainda. Crie o exemplo ou importe um JSON.")
         else:
-            for mid_ in ids:
-                m = load_monster(mid_)
-                if not m:
-                    continue
-
+            for row in rows:
+                mid_ = row["id"]
                 with st.container(border=True):
-                    st.markdown(f"**{m.name}**")
-                    st.caption(f"CA {m.ac} • HP {m.current_hp}/{m.max_hp} • CR {m.cr}")
+                    st.markdown(f"**{row['name']}**")
+                    st.caption(f"CA {row['ac']} • HP {row['current_hp']}/{row['max_hp']} • CR {row['cr']}")
 
                     c1, c2 = st.columns([0.6, 0.4])
                     if c1.button("➡️ Abrir", key=f"open_mon_{mid_}", use_container_width=True):
@@ -177,7 +340,7 @@ def render() -> None:
 
             cols = st.columns(4)
             cols[0].metric("CA", m.ac)
-            cols[1].metric("HP", f"{m.current_hp}/{m.max_hp}")
+            cols[1].metric("HP", f"{m.current_hp}/{m.max_hp}", help=f"Dados de vida: {m.hit_dice}" if m.hit_dice else None)
             cols[2].metric("Desloc.", m.speed)
             cols[3].metric("CR", m.cr)
 
@@ -185,72 +348,8 @@ def render() -> None:
                 with st.expander("✨ Traits", expanded=False):
                     st.markdown(m.traits_md)
 
-            with st.expander("⚔️ Ações (roláveis)", expanded=True):
-                adv = st.session_state.get("m_adv", False)
-                dis = st.session_state.get("m_dis", False)
-                target_ac = st.session_state.get("m_ac", 0)
-                auto_damage = st.session_state.get("m_autodmg", True)
-
-                for i, act in enumerate(m.actions):
-                    r = st.columns([0.55, 0.18, 0.27])
-                    label = act.name
-                    if act.damage:
-                        label += f" — {act.damage} {act.damage_type}".strip()
-
-                    r[0].write(f"**{label}**")
-                    if act.description:
-                        r[0].caption(act.description)
-
-                    if r[1].button("🎯 Ataque", key=f"m_atk_{m.id}_{i}", use_container_width=True):
-                        to_hit = int(act.to_hit or 0)
-                        rr = roll_d20(bonus=to_hit, advantage=adv, disadvantage=dis)
-                        nat = rr["chosen"]
-                        total = rr["total"]
-
-                        if nat == 1:
-                            outcome = "❌ MISS (nat 1)"
-                            hit = False
-                            crit = False
-                        elif nat == 20:
-                            outcome = "💥 CRIT (nat 20)"
-                            hit = True
-                            crit = True
-                        else:
-                            if target_ac and total >= int(target_ac):
-                                outcome = f"✅ HIT vs AC {int(target_ac)}"
-                                hit = True
-                                crit = False
-                            elif target_ac:
-                                outcome = f"❌ MISS vs AC {int(target_ac)}"
-                                hit = False
-                                crit = False
-                            else:
-                                outcome = "🎲 Rolado (sem AC)"
-                                hit = True
-                                crit = False
-
-                        mlog(f"👹 **{m.name}** — {act.name}: {fmt_d20(rr)} → {outcome}")
-
-                        if hit and auto_damage and act.damage:
-                            dmg_expr = critify(act.damage) if crit else act.damage
-                            dr = roll_expr(dmg_expr)
-                            tag = " (CRIT dmg)" if crit else ""
-                            mlog(f"💥 **{m.name}** — Dano {act.name}{tag}: {fmt_expr(dr)}")
-                        st.rerun()
-
-                    if r[2].button("💥 Dano", key=f"m_dmg_{m.id}_{i}", use_container_width=True):
-                        if not act.damage:
-                            mlog(f"ℹ️ **{m.name}** — {act.name}: sem fórmula de dano.")
-                        else:
-                            dr = roll_expr(act.damage)
-                            mlog(f"💥 **{m.name}** — Dano {act.name}: {fmt_expr(dr)}")
-                        st.rerun()
+            # ações e ataque em horda: fragmento (um clique não recarrega a página)
+            _actions_fragment(m.id)
 
     with right:
-        st.markdown("### 📜 Log (Monstros)")
-        if st.button("Limpar log", use_container_width=True, key="m_clear"):
-            st.session_state["m_log"] = []
-            st.rerun()
-
-        for line in st.session_state["m_log"][:250]:
-            st.markdown(line)
+        _log_fragment()
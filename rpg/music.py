@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from .assets import asset
+from .media_server import MEDIA_DIR, ensure_media_server, media_url, static_enabled, static_url
+
+AUDIO_DIR = MEDIA_DIR / "audio"
+AUDIO_EXTS = {".mp3", ".m4a", ".mp4", ".aac", ".ogg", ".opus", ".wav", ".webm"}
+NO_MUSIC = "— sem música —"
+
+# Player único no documento do app (fora do iframe do componente): sobrevive a
+# reruns e à troca de página. Dois decks de <audio> fazem o crossfade; as
+# faixas vêm por URL versionada (?v=etag no servidor de mídia; tamanho+mtime no
+# nome em app/static), então o navegador baixa uma vez só.
+_PLAYER_JS = r"""
+(function () {
+  if (window.__rpgMusic) return;
+  const mk = () => { const a = new Audio(); a.preload = "auto"; a.volume = 0; return a; };
+  const m = window.__rpgMusic = {
+    decks: [mk(), mk()], pre: mk(), cur: 0, idx: -1, playing: false, fading: false,
+    cfg: { key: null, tracks: [], volume: 0.4, fade: 3, shuffle: false },
+  };
+  const deck = () => m.decks[m.cur];
+  function fade(a, to, ms, done) {
+    const from = a.volume, t0 = Date.now();
+    const tick = setInterval(() => {
+      const k = Math.min(1, (Date.now() - t0) / Math.max(1, ms));
+      a.volume = Math.max(0, Math.min(1, from + (to - from) * k));
+      if (k >= 1) { clearInterval(tick); if (done) done(); }
+    }, 50);
+  }
+  function nextIdx() {
+    const n = m.cfg.tracks.length;
+    if (!n) return -1;
+    if (m.cfg.shuffle && n > 1) {
+      let j = m.idx;
+      while (j === m.idx) j = Math.floor(Math.random() * n);
+      return j;
+    }
+    return (m.idx + 1) % n;
+  }
+  function preload() {
+    const j = nextIdx();
+    if (j >= 0) m.pre.src = m.cfg.tracks[j].url;
+  }
+  m.play = function (i) {
+    const n = m.cfg.tracks.length;
+    if (!n) return;
+    m.idx = ((i % n) + n) % n;
+    const old = deck();
+    m.cur = 1 - m.cur;
+    const nxt = deck();
+    nxt.src = m.cfg.tracks[m.idx].url;
+    nxt.volume = 0;
+    m.fading = true;
+    nxt.play().then(() => { m.playing = true; }).catch(() => { m.playing = false; });
+    const ms = m.cfg.fade * 1000;
+    fade(nxt, m.cfg.volume, ms, () => { m.fading = false; });
+    fade(old, 0, ms, () => old.pause());
+    preload();
+  };
+  m.next = () => m.play(nextIdx());
+  m.prev = () => m.play(m.idx - 1);
+  m.toggle = function () {
+    const a = deck();
+    if (m.playing) { fade(a, 0, 300, () => a.pause()); m.playing = false; }
+    else if (!a.src) { m.play(0); }
+    else { a.play().then(() => { m.playing = true; fade(a, m.cfg.volume, 300); }).catch(() => {}); }
+  };
+  m.stop = function () {
+    m.decks.forEach((a) => fade(a, 0, m.cfg.fade * 1000, () => a.pause()));
+    m.playing = false;
+  };
+  m.apply = function (cfg) {
+    const changed = cfg.key !== m.cfg.key;
+    m.cfg = cfg;
+    if (!cfg.tracks.length) { m.stop(); m.cfg.key = cfg.key; return; }
+    if (changed) {
+      m.idx = -1;
+      m.play(cfg.shuffle ? Math.floor(Math.random() * cfg.tracks.length) : 0);
+    } else if (!m.fading) {
+      deck().volume = m.playing ? cfg.volume : 0;
+    }
+  };
+  m.decks.forEach((a) => a.addEventListener("timeupdate", () => {
+    // começa a próxima faixa antes do fim, para o crossfade não deixar buraco
+    if (a === deck() && m.playing && !m.fading && a.duration && a.duration - a.currentTime <= m.cfg.fade) m.next();
+  }));
+  m.decks.forEach((a) => a.addEventListener("ended", () => { if (a === deck() && !m.fading) m.next(); }));
+})();
+"""
+
+_WIDGET_HTML = """
+<div style="font-family:sans-serif;color:#fff;background:#0f0f0f;border:1px solid #ff2b2b;
+            border-radius:10px;padding:6px 8px;display:flex;align-items:center;gap:6px;">
+  <button id="prev" style="{btn}">⏮</button>
+  <button id="play" style="{btn}">⏯</button>
+  <button id="next" style="{btn}">⏭</button>
+  <span id="now" style="font-size:12px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;"></span>
+</div>
+<script>
+  const P = window.parent;
+  if (!P.__rpgMusic) {{
+    const s = P.document.createElement("script");
+    s.textContent = {player};
+    P.document.head.appendChild(s);
+  }}
+  const M = P.__rpgMusic;
+  M.apply({cfg});
+  document.getElementById("prev").onclick = () => M.prev();
+  document.getElementById("play").onclick = () => M.toggle();
+  document.getElementById("next").onclick = () => M.next();
+  const now = document.getElementById("now");
+  setInterval(() => {{
+    const t = M.cfg.tracks[M.idx];
+    now.textContent = t ? (M.playing ? "🎵 " : "⏸ ") + t.name : "—";
+  }}, 500);
+</script>
+"""
+
+_BTN = "background:#b30000;color:#fff;border:1px solid #ff2b2b;border-radius:8px;padding:2px 8px;cursor:pointer;"
+
+_scan_lock = threading.Lock()
+_scan_cache: Tuple[Optional[Tuple], Dict[str, List[Path]]] = (None, {})
+
+
+def _scan_key() -> Tuple:
+    # mtime da pasta e das subpastas: adicionar/remover faixa invalida a lista
+    dirs = [AUDIO_DIR] + (sorted(p for p in AUDIO_DIR.iterdir() if p.is_dir()) if AUDIO_DIR.exists() else [])
+    return tuple((str(d), d.stat().st_mtime_ns) for d in dirs if d.exists())
+
+
+def list_scenes() -> Dict[str, List[Path]]:
+    """
+    Cena -> faixas. Cada subpasta de data/media/audio é uma cena; arquivos soltos
+    na raiz formam a cena "geral"; a música da introdução (assets/musica1.mp4 ou
+    a versão do build de assets) entra na cena "intro".
+    """
+    global _scan_cache
+    key = _scan_key()
+    with _scan_lock:
+        if _scan_cache[0] == key:
+            return _scan_cache[1]
+        scenes: Dict[str, List[Path]] = {}
+        intro = asset("intro_music")
+        if intro:
+            scenes["intro"] = [intro]
+        if AUDIO_DIR.exists():
+            for p in sorted(AUDIO_DIR.iterdir()):
+                if p.is_dir():
+                    tracks = sorted(f for f in p.iterdir() if f.suffix.lower() in AUDIO_EXTS)
+                    if tracks:
+                        scenes.setdefault(p.name, []).extend(tracks)
+                elif p.suffix.lower() in AUDIO_EXTS:
+                    scenes.setdefault("geral", []).append(p)
+        _scan_cache = (key, scenes)
+        return scenes
+
+
+def playlist(scene: str) -> List[Dict[str, str]]:
+    out = []
+    for p in list_scenes().get(scene, []):
+        # servidor de mídia (opcional) ou, por padrão, o static serving do Streamlit
+        url = media_url(p) or static_url(p)
+        if url:
+            out.append({"name": p.stem, "url": url})
+    return out
+
+
+def _render_native(paths: List[Path]) -> None:
+    """Player nativo (st.audio) da faixa escolhida: sem crossfade, para quando não há static serving nem servidor de mídia."""
+    if not paths:
+        return
+    track = paths[0]
+    if len(paths) > 1:
+        track = st.selectbox("Faixa", paths, format_func=lambda p: p.stem, key="music_track")
+    st.audio(str(track), loop=True)
+
+
+def render_player(default_scene: Optional[str] = None) -> None:
+    """Controles de música (barra lateral) + o player persistente."""
+    scenes = list_scenes()
+    if not scenes:
+        return
+    options = [NO_MUSIC] + list(scenes)
+    if "music_scene" not in st.session_state and default_scene in scenes:
+        st.session_state["music_scene"] = default_scene
+
+    st.markdown("#### 🎵 Trilha")
+    scene = st.selectbox("Cena", options, key="music_scene", label_visibility="collapsed")
+    paths = scenes.get(scene, [])
+    tracks = playlist(scene) if scene != NO_MUSIC else []
+    persistent = ensure_media_server() is not None or static_enabled()
+    if not persistent or len(tracks) < len(paths):
+        # sem URL para o player persistente: st.audio da faixa, servida pelo Streamlit
+        _render_native(paths)
+        return
+
+    c1, c2 = st.columns(2)
+    volume = c1.slider("Volume", 0, 100, value=40, key="music_vol")
+    fade = c2.slider("Crossfade (s)", 0, 10, value=3, key="music_fade")
+    shuffle = st.checkbox("Aleatório", value=False, key="music_shuffle")
+
+    cfg = {
+        "key": f"{scene}|{shuffle}|{'|'.join(t['url'] for t in tracks)}",
+        "tracks": tracks,
+        "volume": volume / 100,
+        "fade": int(fade),
+        "shuffle": bool(shuffle),
+    }
+    components.html(
+        _WIDGET_HTML.format(btn=_BTN, player=json.dumps(_PLAYER_JS), cfg=json.dumps(cfg)),
+        height=48,
+    )
@@ -1,9 +1,21 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import multiprocessing
+import os
 import re
+import threading
+import time
+import tracemalloc
+import unicodedata
 import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from io import BytesIO
-from typing import Any, Dict, Optional
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 # tenta pypdf primeiro; se não tiver, tenta PyPDF2
 try:
@@ -12,6 +24,12 @@ except Exception:  # pragma: no cover
     from PyPDF2 import PdfReader  # type: ignore
 
 from .models import Character, Weapon
+from .storage import DATA_DIR
+
+PDF_CACHE_DIR = DATA_DIR / "cache" / "pdf"
+# versão do importador gravada em cada entrada do cache em disco: subir sempre que
+# _character_from_fields mudar (campos novos, normalização), senão fichas antigas voltam
+IMPORTER_VERSION = 2
 
 
 def _to_str(v: Any) -> str:
@@ -69,8 +87,91 @@ def _normalize_damage(expr: str) -> str:
     return s if "d" in s else ""
 
 
-def _extract_form_fields(pdf_bytes: bytes) -> Dict[str, str]:
-    reader = PdfReader(BytesIO(pdf_bytes))
+def _norm_key(name: str) -> str:
+    # "Raça ", "RACA" e "raça" viram a mesma chave (sem acento, caixa ou espaços)
+    s = unicodedata.normalize("NFKD", _to_str(name))
+    s = "".join(c for c in s if not unicodedata.combining(c))
+    return "".join(s.casefold().split())
+
+
+class FieldIndex(dict):
+    """
+    Campos do formulário (nome -> valor) + índice por chave normalizada,
+    montado uma vez; cada busca é O(1) em vez de varrer todos os campos.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, str]] = None):
+        super().__init__(fields or {})
+        self.stats: Optional[ImportStats] = None
+        self._norm: Dict[str, str] = {}
+        for k, v in self.items():
+            nk = _norm_key(k)
+            if not self._norm.get(nk):  # fica com o primeiro valor não vazio
+                self._norm[nk] = v
+
+    def has(self, name: str) -> bool:
+        return name in self or _norm_key(name) in self._norm
+
+    def lookup(self, *names: str) -> str:
+        for name in names:
+            v = self.get(name)
+            if v:
+                return v
+            v = self._norm.get(_norm_key(name))
+            if v:
+                return v
+        return ""
+
+
+class ImportStats(NamedTuple):
+    mode: str
+    seconds: float
+    peak_bytes: int
+    n_fields: int
+
+
+def _walk_acroform(reader: Any) -> Dict[str, str]:
+    """
+    Lê só /Root/AcroForm/Fields (e os /Kids com nome), sem tocar em páginas,
+    content streams ou imagens: o pypdf resolve objetos sob demanda, então
+    o custo depende do nº de campos e não do tamanho do PDF.
+    """
+    root = reader.trailer["/Root"].get_object()
+    acro = root.get("/AcroForm")
+    if acro is None:
+        return {}
+    acro = acro.get_object()
+
+    out: Dict[str, str] = {}
+    fields = acro.get("/Fields")
+    fields = fields.get_object() if fields is not None else []
+    stack = [(ref, "", None) for ref in reversed(list(fields))]
+    seen = set()
+    while stack:
+        ref, prefix, inherited = stack.pop()
+        key_id = getattr(ref, "idnum", None)
+        if key_id is not None:
+            if key_id in seen:  # PDFs quebrados às vezes têm ciclos
+                continue
+            seen.add(key_id)
+        obj = ref.get_object()
+        t = obj.get("/T")
+        name = prefix
+        if t is not None:
+            name = f"{prefix}.{_to_str(t)}" if prefix else _to_str(t)
+        value = obj.get("/V", inherited)
+
+        kids = obj.get("/Kids")
+        kids = kids.get_object() if kids is not None else []
+        named_kids = [k for k in kids if "/T" in k.get_object()]
+        if named_kids:
+            stack.extend((k, name, value) for k in reversed(named_kids))
+        elif name:
+            out[name.strip()] = _to_str(value.get_object() if hasattr(value, "get_object") else value).strip()
+    return out
+
+
+def _get_fields_full(reader: Any) -> Dict[str, str]:
     raw = reader.get_fields() or {}
 
     out: Dict[str, str] = {}
@@ -93,19 +194,209 @@ def _extract_form_fields(pdf_bytes: bytes) -> Dict[str, str]:
     return out
 
 
-def _pick(fields: Dict[str, str], *names: str) -> str:
+# RPG_IMPORT_MEASURE=1 mede o pico de memória da leitura (tracemalloc deixa o parse mais lento)
+MEASURE_MEMORY = os.environ.get("RPG_IMPORT_MEASURE") == "1"
+_trace_lock = threading.Lock()
+
+
+def _extract_form_fields(pdf_bytes: bytes, mode: str = "lazy", measure: Optional[bool] = None) -> FieldIndex:
     """
-    Busca por chaves exatas e também tentando variantes com/sem espaços.
+    mode="lazy": só o dicionário AcroForm (padrão; cai no "full" se falhar)
+    mode="full": reader.get_fields() (percorre o documento inteiro)
+    O FieldIndex devolvido traz .stats (tempo e, com measure, pico de memória;
+    0 = não medido).
     """
-    for name in names:
-        n = name.strip()
-        if n in fields and fields[n]:
-            return fields[n]
-        # tenta achar por case-insensitive
-        for k, v in fields.items():
-            if k.strip().lower() == n.lower() and v:
-                return v
-    return ""
+    if measure is None:
+        measure = MEASURE_MEMORY
+    # tracemalloc é global do processo: só mede quem consegue ligá-lo sozinho
+    # (nunca mexe num tracing já ativo nem no de outra sessão em andamento)
+    traced = measure and not tracemalloc.is_tracing() and _trace_lock.acquire(blocking=False)
+    if traced:
+        tracemalloc.start()
+    peak = 0
+    t0 = time.perf_counter()
+    try:
+        reader = PdfReader(BytesIO(pdf_bytes))
+        out: Dict[str, str] = {}
+        used = mode
+        if mode == "lazy":
+            try:
+                out = _walk_acroform(reader)
+            except Exception:
+                out = {}
+            if not out:
+                used = "full"
+        if used == "full":
+            out = _get_fields_full(reader)
+        seconds = time.perf_counter() - t0
+        if traced:
+            peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if traced:
+            tracemalloc.stop()
+            _trace_lock.release()
+
+    idx = FieldIndex(out)
+    idx.stats = ImportStats(used, seconds, peak, len(out))
+    return idx
+
+
+# ====== layouts de ficha: campo lógico -> nomes possíveis no PDF ======
+# O layout com mais campos presentes vence; os outros servem de fallback.
+
+TEMPLATES: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "wotc_en": {
+        "character_name": ("CharacterName",),
+        "player_name": ("PlayerName",),
+        "species": ("Race",),
+        "class_and_level": ("ClassLevel",),
+        "background": ("Background",),
+        # Atenção: em MUITAS fichas PDF, o campo "STRmod" guarda o SCORE (14),
+        # e o campo "STR" guarda o MOD (+2). Então pegamos o SCORE pelos "*mod".
+        "str_score": ("STRmod", "StrengthScore", "STR SCORE"),
+        "dex_score": ("DEXmod", "DexterityScore", "DEX SCORE"),
+        "con_score": ("CONmod", "ConstitutionScore", "CON SCORE"),
+        "int_score": ("INTmod", "IntelligenceScore", "INT SCORE"),
+        "wis_score": ("WISmod", "WisdomScore", "WIS SCORE"),
+        "cha_score": ("CHamod", "CharismaScore", "CHA SCORE"),
+        "ac": ("AC",),
+        "initiative": ("Initiative",),
+        "speed": ("Speed",),
+        "hp_max": ("HPMax",),
+        "hp_current": ("HPCurrent",),
+        "hp_temp": ("HPTemp",),
+        "equipment": ("Equipment",),
+        "race_traits": ("Feat+Traits", "Racial Traits"),
+        "class_features": ("Features and Traits", "Class Features"),
+        "prof_lang": ("ProficienciesLang",),
+        "wpn1_name": ("Wpn Name",),
+        "wpn1_atk": ("Wpn1 AtkBonus",),
+        "wpn1_dmg": ("Wpn1 Damage",),
+        "wpn2_name": ("Wpn Name 2",),
+        "wpn2_atk": ("Wpn2 AtkBonus",),
+        "wpn2_dmg": ("Wpn2 Damage",),
+        "wpn3_name": ("Wpn Name 3",),
+        "wpn3_atk": ("Wpn3 AtkBonus",),
+        "wpn3_dmg": ("Wpn3 Damage",),
+        "prof_bonus": ("ProfBonus",),
+        "alignment": ("Alignment",),
+        "xp": ("XP",),
+        "inspiration": ("Inspiration",),
+        "personality": ("PersonalityTraits",),
+        "ideals": ("Ideals",),
+        "bonds": ("Bonds",),
+        "flaws": ("Flaws",),
+        "spell_class": ("Spellcasting Class 2",),
+        "spell_ability": ("SpellcastingAbility 2",),
+        "spell_save_dc": ("SpellSaveDC 2",),
+        "spell_atk": ("SpellAtkBonus 2",),
+    },
+    "pt_br": {
+        "character_name": ("NOME DO PERSONAGEM",),
+        "player_name": ("NOME DO JOGADOR",),
+        "species": ("RAÇA",),
+        "class_and_level": ("CLASSE E NÍVEL",),
+        "background": ("ANTECEDENTE",),
+        "ac": ("ARMD",),
+        "initiative": ("INICIATIVA",),
+        "speed": ("DESLOC.",),
+        "hp_max": ("PV Totais",),
+        "hp_current": ("PONTOS DE VIDA ATUAIS",),
+        "hp_temp": ("PONTOS DE VIDA TEMPORÁRIOS",),
+        "equipment": ("EQUIPAMENTO",),
+        "prof_lang": ("IDIOMAS E OUTRAS PROFICIÊNCIAS",),
+        "prof_bonus": ("BÔNUS DE PROFICIÊNCIA",),
+        "alignment": ("TENDÊNCIA",),
+        "xp": ("PONTOS DE EXPERIÊNCIA",),
+        "inspiration": ("INSPIRAÇÃO",),
+        "personality": ("TRAÇOS DE PERSONALIDADE",),
+        "ideals": ("IDEAIS",),
+        "bonds": ("VÍNCULOS",),
+        "flaws": ("DEFEITOS",),
+        "spell_class": ("CLASSE CONJURADORA",),
+        "spell_ability": ("HABILIDADE CHAVE",),
+        "spell_save_dc": ("CD PARA RESISTIR",),
+        "spell_atk": ("BÔNUS DE ATAQUE MÁGICO",),
+    },
+}
+
+# Perícias: nome exibido -> (nome na ficha WotC, nome na ficha PT-BR)
+SKILLS: Tuple[Tuple[str, str, str], ...] = (
+    ("Acrobatics", "Acrobatics", "ACROBACIA"),
+    ("Animal Handling", "Animal", "ADESTRAR ANIMAIS"),
+    ("Arcana", "Arcana", "ARCANISMO"),
+    ("Athletics", "Athletics", "ATLETISMO"),
+    ("Deception", "Deception", "ENGANAÇÃO"),
+    ("History", "History", "HISTÓRIA"),
+    ("Insight", "Insight", "INTUIÇÃO"),
+    ("Intimidation", "Intimidation", "INTIMIDAÇÃO"),
+    ("Investigation", "Investigation", "INVESTIGAÇÃO"),
+    ("Medicine", "Medicine", "MEDICINA"),
+    ("Nature", "Nature", "NATUREZA"),
+    ("Perception", "Perception", "PERCEPÇÃO"),
+    ("Performance", "Performance", "ATUAÇÃO"),
+    ("Persuasion", "Persuasion", "PERSUASÃO"),
+    ("Religion", "Religion", "RELIGIÃO"),
+    ("Sleight of Hand", "SleightofHand", "PRESTIDIGITAÇÃO"),
+    ("Stealth", "Stealth", "FURTIVIDADE"),
+    ("Survival", "Survival", "SOBREVIVÊNCIA"),
+)
+
+# Testes de resistência: sigla -> (WotC, PT-BR)
+SAVES: Tuple[Tuple[str, str, str], ...] = (
+    ("STR", "ST Strength", "RESISTÊNCIA FORÇA"),
+    ("DEX", "ST Dexterity", "RESISTÊNCIA DESTREZA"),
+    ("CON", "ST Constitution", "RESISTÊNCIA CONSTITUIÇÃO"),
+    ("INT", "ST Intelligence", "RESISTÊNCIA INTELIGÊNCIA"),
+    ("WIS", "ST Wisdom", "RESISTÊNCIA SABEDORIA"),
+    ("CHA", "ST Charisma", "RESISTÊNCIA CARISMA"),
+)
+
+for _label, _en, _pt in SKILLS:
+    TEMPLATES["wotc_en"][f"skill:{_label}"] = (_en,)
+    TEMPLATES["pt_br"][f"skill:{_label}"] = (_pt,)
+for _abv, _en, _pt in SAVES:
+    TEMPLATES["wotc_en"][f"save:{_abv}"] = (_en,)
+    TEMPLATES["pt_br"][f"save:{_abv}"] = (_pt,)
+# Slots de magia: na ficha WotC os níveis 1..9 são "SlotsTotal 19".."SlotsTotal 27"
+for _lvl in range(1, 10):
+    TEMPLATES["wotc_en"][f"slots_total:{_lvl}"] = (f"SlotsTotal {18 + _lvl}",)
+    TEMPLATES["wotc_en"][f"slots_remaining:{_lvl}"] = (f"SlotsRemaining {18 + _lvl}",)
+    TEMPLATES["pt_br"][f"slots_total:{_lvl}"] = (f"ESPAÇOS TOTAIS {_lvl}",)
+    TEMPLATES["pt_br"][f"slots_remaining:{_lvl}"] = (f"ESPAÇOS GASTOS {_lvl}",)
+
+# famílias de campos com a lista de magias ("Spells 1014", "Spells 1015", ...)
+_SPELL_FAMILY_RE = re.compile(r"^(?:spells|magias?)(\d+)$")
+
+
+class ResolvedFields(NamedTuple):
+    template: str
+    fields: FieldIndex
+
+    def get(self, logical: str) -> str:
+        # primeiro os nomes do layout detectado, depois os dos outros
+        order = [self.template] + [t for t in TEMPLATES if t != self.template]
+        for t in order:
+            names = TEMPLATES.get(t, {}).get(logical)
+            if names:
+                v = self.fields.lookup(*names)
+                if v:
+                    return v
+        return ""
+
+
+def detect_template(fields: FieldIndex) -> str:
+    best, best_score = "", 0
+    for name, table in TEMPLATES.items():
+        score = sum(1 for names in table.values() if any(fields.has(n) for n in names))
+        if score > best_score:
+            best, best_score = name, score
+    return best
+
+
+def resolve_fields(fields: Dict[str, str]) -> ResolvedFields:
+    idx = fields if isinstance(fields, FieldIndex) else FieldIndex(fields)
+    return ResolvedFields(detect_template(idx), idx)
 
 
 def import_character_from_pdf(pdf_bytes: bytes, char_id: Optional[str] = None) -> Character:
@@ -113,11 +404,13 @@ def import_character_from_pdf(pdf_bytes: bytes, char_id: Optional[str] = None) -
     Importa ficha a partir de PDF FORM (AcroForm).
     Se o PDF não tiver campos, retorna ficha básica.
     """
+    return _character_from_fields(_extract_form_fields(pdf_bytes), char_id)
+
+
+def _character_from_fields(fields: Dict[str, str], char_id: Optional[str] = None) -> Character:
     if not char_id:
         char_id = uuid.uuid4().hex[:10]
 
-    fields = _extract_form_fields(pdf_bytes)
-
     # Se não vier nada útil (PDF só com labels), cai num personagem mínimo
     if not fields or all((not _to_str(v).strip()) for v in fields.values()):
         return Character(
@@ -130,11 +423,13 @@ def import_character_from_pdf(pdf_bytes: bytes, char_id: Optional[str] = None) -
             level=1,
         )
 
-    character_name = _pick(fields, "CharacterName", "NOME DO PERSONAGEM")
-    player_name = _pick(fields, "PlayerName", "NOME DO JOGADOR")
-    species = _pick(fields, "Race", "Race ", "RAÇA")
-    class_and_level = _pick(fields, "ClassLevel", "CLASSE E NÍVEL")
-    background = _pick(fields, "Background", "ANTECEDENTE")
+    rf = resolve_fields(fields)
+
+    character_name = rf.get("character_name")
+    player_name = rf.get("player_name")
+    species = rf.get("species")
+    class_and_level = rf.get("class_and_level")
+    background = rf.get("background")
 
     # tenta extrair nível do texto (último número)
     lvl = 1
@@ -142,45 +437,38 @@ def import_character_from_pdf(pdf_bytes: bytes, char_id: Optional[str] = None) -
     if m:
         lvl = int(m.group(1))
 
-    # Atenção: em MUITAS fichas PDF, o campo "STRmod" guarda o SCORE (14),
-    # e o campo "STR" guarda o MOD (+2). Então pegamos o SCORE pelos "*mod".
-    str_score = _parse_int(_pick(fields, "STRmod", "StrengthScore", "STR SCORE"), 10)
-    dex_score = _parse_int(_pick(fields, "DEXmod", "DEXmod ", "DexterityScore", "DEX SCORE"), 10)
-    con_score = _parse_int(_pick(fields, "CONmod", "ConstitutionScore", "CON SCORE"), 10)
-    int_score = _parse_int(_pick(fields, "INTmod", "IntelligenceScore", "INT SCORE"), 10)
-    wis_score = _parse_int(_pick(fields, "WISmod", "WisdomScore", "WIS SCORE"), 10)
-    cha_score = _parse_int(_pick(fields, "CHamod", "CHAmod", "CharismaScore", "CHA SCORE"), 10)
+    str_score = _parse_int(rf.get("str_score"), 10)
+    dex_score = _parse_int(rf.get("dex_score"), 10)
+    con_score = _parse_int(rf.get("con_score"), 10)
+    int_score = _parse_int(rf.get("int_score"), 10)
+    wis_score = _parse_int(rf.get("wis_score"), 10)
+    cha_score = _parse_int(rf.get("cha_score"), 10)
 
-    ac = _parse_int(_pick(fields, "AC", "ARMD"), 10)
-    initiative_bonus = _parse_int(_pick(fields, "Initiative", "INICIATIVA"), 0)
-    speed = _parse_int(_pick(fields, "Speed", "DESLOC."), 30)
+    ac = _parse_int(rf.get("ac"), 10)
+    initiative_bonus = _parse_int(rf.get("initiative"), 0)
+    speed = _parse_int(rf.get("speed"), 30)
 
-    max_hp = _parse_int(_pick(fields, "HPMax", "PV Totais"), 10)
-    current_hp = _parse_int(_pick(fields, "HPCurrent", "PONTOS DE VIDA ATUAIS"), max_hp)
-    temp_hp = _parse_int(_pick(fields, "HPTemp", "PONTOS DE VIDA TEMPORÁRIOS"), 0)
+    max_hp = _parse_int(rf.get("hp_max"), 10)
+    current_hp = _parse_int(rf.get("hp_current"), max_hp)
+    temp_hp = _parse_int(rf.get("hp_temp"), 0)
 
     # Equipamentos (campo multiline)
-    equipment_raw = _pick(fields, "Equipment", "EQUIPAMENTO")
+    equipment_raw = rf.get("equipment")
     equipment = [ln.strip() for ln in equipment_raw.splitlines() if ln.strip()]
 
     # Traits / Features (viram Markdown)
-    race_traits = _pick(fields, "Feat+Traits", "Racial Traits")
-    class_features = _pick(fields, "Features and Traits", "Class Features")
-    prof_lang = _pick(fields, "ProficienciesLang", "IDIOMAS E OUTRAS PROFICIÊNCIAS")
+    race_traits = rf.get("race_traits")
+    class_features = rf.get("class_features")
+    prof_lang = rf.get("prof_lang")
 
     # Armas (3 slots comuns)
     weapons: list[Weapon] = []
-    slots = [
-        ("Wpn Name", "Wpn1 AtkBonus", "Wpn1 Damage"),
-        ("Wpn Name 2", "Wpn2 AtkBonus", "Wpn2 Damage"),
-        ("Wpn Name 3", "Wpn3 AtkBonus", "Wpn3 Damage"),
-    ]
-    for name_k, atk_k, dmg_k in slots:
-        wname = _pick(fields, name_k)
+    for i in (1, 2, 3):
+        wname = rf.get(f"wpn{i}_name")
         if not wname:
             continue
-        atk = _parse_bonus(_pick(fields, atk_k), 0)
-        dmg = _normalize_damage(_pick(fields, dmg_k))
+        atk = _parse_bonus(rf.get(f"wpn{i}_atk"), 0)
+        dmg = _normalize_damage(rf.get(f"wpn{i}_dmg"))
         if not dmg:
             dmg = "1d4+0"
         weapons.append(
@@ -193,6 +481,43 @@ def import_character_from_pdf(pdf_bytes: bytes, char_id: Optional[str] = None) -
             )
         )
 
+    # Perícias e saves (bônus prontos da ficha). A ordem alfabética já fica
+    # gravada no dict, então a ficha renderiza sem reordenar a cada rerun.
+    skill_mods: Dict[str, int] = {}
+    for label, _, _ in sorted(SKILLS, key=lambda x: x[0].lower()):
+        v = rf.get(f"skill:{label}")
+        if v.strip():
+            skill_mods[label] = _parse_bonus(v, 0)
+    save_mods: Dict[str, int] = {}
+    for abv, _, _ in SAVES:
+        v = rf.get(f"save:{abv}")
+        if v.strip():
+            save_mods[abv] = _parse_bonus(v, 0)
+
+    # Slots de magia
+    slots_total: Dict[str, int] = {}
+    slots_remaining: Dict[str, int] = {}
+    for slot_lvl in range(1, 10):
+        t = _parse_int(rf.get(f"slots_total:{slot_lvl}"), 0)
+        if t:
+            slots_total[str(slot_lvl)] = t
+            slots_remaining[str(slot_lvl)] = _parse_int(rf.get(f"slots_remaining:{slot_lvl}"), t)
+
+    spell_meta: Dict[str, str] = {}
+    for label, key in (("Class", "spell_class"), ("Ability", "spell_ability"), ("Save DC", "spell_save_dc"), ("Attack Bonus", "spell_atk")):
+        v = rf.get(key).strip()
+        if v:
+            spell_meta[label] = v
+
+    # Uma passada pelos campos: família de magias + dump completo (ordenado)
+    spell_rows = []
+    for k, v in fields.items():
+        m = _SPELL_FAMILY_RE.match(_norm_key(k))
+        if m and v.strip():
+            spell_rows.append((int(m.group(1)), v.strip()))
+    spells = [v for _, v in sorted(spell_rows)]
+    raw = {k: fields[k] for k in sorted(fields, key=str.lower)}
+
     # evita campos vazios demais
     if not character_name:
         character_name = "Personagem Importado"
@@ -226,5 +551,186 @@ def import_character_from_pdf(pdf_bytes: bytes, char_id: Optional[str] = None) -
         race_notes_md=race_traits.strip(),
         background_notes_md=prof_lang.strip() if prof_lang else "",
         class_notes_md=class_features.strip(),
+
+        prof_bonus=_parse_bonus(rf.get("prof_bonus"), 0),
+        alignment=rf.get("alignment").strip(),
+        xp=rf.get("xp").strip(),
+        inspiration=rf.get("inspiration").strip(),
+        personality_traits=rf.get("personality").strip(),
+        ideals=rf.get("ideals").strip(),
+        bonds=rf.get("bonds").strip(),
+        flaws=rf.get("flaws").strip(),
+
+        skill_mods=skill_mods,
+        save_mods=save_mods,
+        spells=spells,
+        spell_slots_total=slots_total,
+        spell_slots_remaining=slots_remaining,
+        spellcasting_meta=spell_meta,
+        raw_pdf_fields=raw,
+
+        pdf_template=rf.template,
     )
     return ch
+
+
+# ====== cache por conteúdo (SHA-256 do PDF) ======
+# Reruns do Streamlit e uploads repetidos não re-parseiam o PDF e mantêm o mesmo id.
+
+
+def pdf_digest(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+class _ImportCache:
+    def __init__(self, maxsize: int = 32, disk_dir: Optional[Path] = PDF_CACHE_DIR):
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self._items: "OrderedDict[str, Tuple[Optional[Dict[str, str]], Character]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _disk_path(self, digest: str) -> Optional[Path]:
+        return self.disk_dir / f"{digest}.json" if self.disk_dir else None
+
+    def get_entry(self, digest: str) -> Optional[Tuple[Optional[Dict[str, str]], Character]]:
+        with self._lock:
+            hit = self._items.get(digest)
+            if hit is not None:
+                self._items.move_to_end(digest)
+                return hit
+        path = self._disk_path(digest)
+        if path is None or not path.exists():
+            return None
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            if raw.get("version") != IMPORTER_VERSION:
+                return None  # gravada por outro importador: lê o PDF de novo
+            entry = (raw.get("fields"), Character.model_validate(raw["character"]))
+        except Exception:
+            return None
+        self.put(digest, *entry, disk=False)
+        return entry
+
+    def get(self, digest: str) -> Optional[Character]:
+        entry = self.get_entry(digest)
+        return entry[1].model_copy(deep=True) if entry else None
+
+    def put(self, digest: str, fields: Optional[Dict[str, str]], ch: Character, disk: bool = True) -> None:
+        with self._lock:
+            self._items[digest] = (fields, ch.model_copy(deep=True))
+            self._items.move_to_end(digest)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        path = self._disk_path(digest) if disk else None
+        if path is not None:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_text(
+                    json.dumps(
+                        {"version": IMPORTER_VERSION, "fields": fields, "character": ch.model_dump()},
+                        ensure_ascii=False,
+                    ),
+                    encoding="utf-8",
+                )
+                tmp.replace(path)
+            except OSError:
+                pass
+
+
+_import_cache = _ImportCache()
+
+
+def import_character_cached(pdf_bytes: bytes) -> Character:
+    """
+    Igual a import_character_from_pdf, mas com cache LRU (memória + data/cache/pdf)
+    pela SHA-256 dos bytes: o mesmo PDF devolve sempre a mesma ficha (mesmo id).
+    """
+    digest = pdf_digest(pdf_bytes)
+    hit = _import_cache.get(digest)
+    if hit is not None:
+        return hit
+    fields = _extract_form_fields(pdf_bytes)
+    ch = _character_from_fields(fields, digest[:10])
+    _import_cache.put(digest, fields, ch)
+    return ch.model_copy(deep=True)
+
+
+def import_stats(pdf_bytes: bytes) -> Optional[ImportStats]:
+    """Tempo/pico de memória da última leitura deste PDF (se ainda estiver no cache em memória)."""
+    entry = _import_cache.get_entry(pdf_digest(pdf_bytes))
+    return getattr(entry[0], "stats", None) if entry else None
+
+
+# ====== importação em lote ======
+
+
+class PdfImportResult(NamedTuple):
+    name: str
+    character: Optional[Character]
+    error: str = ""
+
+
+def expand_uploads(files: Iterable[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """(nome, bytes) de PDFs e/ou ZIPs -> lista plana de (nome, bytes) de PDFs."""
+    out: List[Tuple[str, bytes]] = []
+    for name, data in files:
+        if name.lower().endswith(".zip") or data[:2] == b"PK":
+            try:
+                with zipfile.ZipFile(BytesIO(data)) as zf:
+                    for info in zf.infolist():
+                        if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                            out.append((f"{name}/{info.filename}", zf.read(info)))
+            except zipfile.BadZipFile:
+                out.append((name, data))
+        else:
+            out.append((name, data))
+    return out
+
+
+def _import_one(item: Tuple[str, bytes]) -> PdfImportResult:
+    # roda no processo filho: precisa ser função de módulo (picklável)
+    name, data = item
+    try:
+        return PdfImportResult(name, import_character_cached(data))
+    except Exception as e:
+        return PdfImportResult(name, None, f"{type(e).__name__}: {e}")
+
+
+def import_characters_from_pdfs(
+    files: Iterable[Tuple[str, bytes]],
+    max_workers: Optional[int] = None,
+) -> Iterator[PdfImportResult]:
+    """
+    Importa vários PDFs em paralelo num ProcessPoolExecutor (o pypdf é
+    CPU-bound). ZIPs devem passar antes por expand_uploads. Os resultados
+    saem conforme cada arquivo termina, para a UI mostrar o progresso;
+    erros vêm no próprio resultado.
+    """
+    items = []
+    for name, data in files:
+        hit = _import_cache.get(pdf_digest(data))
+        if hit is not None:
+            yield PdfImportResult(name, hit)
+        else:
+            items.append((name, data))
+    if len(items) <= 1 or max_workers == 1:
+        for item in items:
+            yield _import_one(item)
+        return
+
+    # "spawn": o servidor do Streamlit tem várias threads (e locks do storage/cache);
+    # um fork copiaria locks travados e o filho poderia ficar preso
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(_import_one, item): (item[0], pdf_digest(item[1])) for item in items}
+        for fut in as_completed(futures):
+            name, digest = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as e:  # processo filho morreu
+                yield PdfImportResult(name, None, f"{type(e).__name__}: {e}")
+                continue
+            if res.character is not None:
+                # o filho já gravou o cache em disco; aqui só aquecemos a memória
+                _import_cache.put(digest, None, res.character, disk=False)
+            yield res
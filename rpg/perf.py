@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List
+
+import numpy as np
+import streamlit as st
+
+WINDOW = 200  # últimas N execuções por trecho
+
+_lock = threading.Lock()
+_samples: Dict[str, Deque[float]] = {}
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Mede o tempo de servidor de um trecho (página inteira ou fragmento)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        with _lock:
+            _samples.setdefault(name, deque(maxlen=WINDOW)).append(dt)
+
+
+def summary(prefix: str = "") -> List[Dict[str, object]]:
+    """Uma linha por trecho: nº de execuções, última, mediana e p90 (ms)."""
+    with _lock:
+        snap = {k: list(v) for k, v in _samples.items() if k.startswith(prefix)}
+    out = []
+    for name, xs in sorted(snap.items()):
+        a = np.asarray(xs) * 1000
+        out.append({
+            "trecho": name,
+            "n": len(xs),
+            "última (ms)": round(float(a[-1]), 1),
+            "mediana (ms)": round(float(np.median(a)), 1),
+            "p90 (ms)": round(float(np.percentile(a, 90)), 1),
+        })
+    return out
+
+
+def reset() -> None:
+    with _lock:
+        _samples.clear()
+
+
+def render_timings(prefix: str = "") -> None:
+    """Expander com os tempos medidos (RPG_PERF=1 para mostrar)."""
+    if os.environ.get("RPG_PERF") != "1":
+        return
+    rows = summary(prefix)
+    with st.expander("⏱️ Desempenho (servidor)", expanded=False):
+        if rows:
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+        else:
+            st.caption("—")
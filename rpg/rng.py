@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import secrets
+import threading
+from typing import Any, List, MutableMapping, Optional
+
+import numpy as np
+
+
+class DiceRNG:
+    """
+    Gerador de dados com semente própria (NumPy PCG64).
+    Cada sessão/encontro tem o seu: mesma semente + mesma sequência de
+    rolagens = mesmos resultados (replay para tirar dúvida de mesa).
+    """
+
+    def __init__(self, seed: Optional[int] = None, buffer_size: int = 4096):
+        self.seed = int(seed) if seed is not None else secrets.randbits(32)
+        self.buffer_size = max(1, int(buffer_size))
+        self.draws = 0  # nº de dados sorteados (para conferir um replay)
+        self._gen = np.random.Generator(np.random.PCG64(self.seed))
+        self._buf: List[float] = []
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def _next_uniform(self) -> float:
+        # rolagens unitárias saem de um buffer pré-sorteado em bloco
+        if self._pos >= len(self._buf):
+            self._buf = self._gen.random(self.buffer_size).tolist()
+            self._pos = 0
+        u = self._buf[self._pos]
+        self._pos += 1
+        return u
+
+    def roll(self, sides: int) -> int:
+        with self._lock:
+            self.draws += 1
+            return int(self._next_uniform() * int(sides)) + 1
+
+    def roll_n(self, n: int, sides: int) -> List[int]:
+        sides = int(sides)
+        with self._lock:
+            self.draws += max(0, n)
+            return [int(self._next_uniform() * sides) + 1 for _ in range(n)]
+
+    def integers(self, highs: Any, size: Any) -> np.ndarray:
+        """Lote vetorizado: valores em [1, highs) (highs pode ser array por coluna)."""
+        with self._lock:
+            out = self._gen.integers(1, highs, size=size)
+            self.draws += int(out.size)
+            return out
+
+    def spawn(self, key: int) -> "DiceRNG":
+        # fluxo filho determinístico (ex.: um por encontro)
+        seq = np.random.SeedSequence([self.seed, int(key)])
+        return DiceRNG(int(seq.generate_state(1)[0]), self.buffer_size)
+
+    def replay(self) -> "DiceRNG":
+        return DiceRNG(self.seed, self.buffer_size)
+
+
+DEFAULT_RNG = DiceRNG()
+
+
+def session_rng(state: MutableMapping, key: str = "rng", seed: Optional[int] = None) -> DiceRNG:
+    """Busca (ou cria) o DiceRNG guardado em st.session_state[key]."""
+    rng = state.get(key)
+    if not isinstance(rng, DiceRNG) or (seed is not None and rng.seed != int(seed)):
+        rng = DiceRNG(seed)
+        state[key] = rng
+    return rng
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from itertools import islice
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, MutableMapping, Optional
+
+import streamlit as st
+
+from .storage import DATA_DIR
+
+LOG_DIR = DATA_DIR / "logs"
+MAX_RECORDS = int(os.environ.get("RPG_LOG_MAX", "1000"))
+PAGE_SIZE = 25
+# intervalo (s) em que o fragmento do log (só ele, não a página) se atualiza sozinho; 0 desliga
+LOG_POLL = float(os.environ.get("RPG_LOG_POLL", "10"))
+
+
+@dataclass
+class RollRecord:
+    icon: str
+    label: str
+    actor: str = ""
+    detail: str = ""                # markdown já formatado (fmt_d20/fmt_expr/...)
+    kind: str = "info"              # "d20" | "expr" | "attacks_many" | "info"
+    total: Optional[int] = None
+    data: Dict[str, Any] = field(default_factory=dict)   # dados crus (vão para o JSONL)
+    ts: float = field(default_factory=time.time)
+
+    def markdown(self) -> str:
+        head = f"{self.icon} **{self.actor}** — {self.label}" if self.actor else f"{self.icon} {self.label}".strip()
+        return f"{head}: {self.detail}" if self.detail else head
+
+
+def _jsonable(roll: Dict[str, Any]) -> Dict[str, Any]:
+    # arrays NumPy (rolagens em lote) viram listas
+    out = {}
+    for k, v in roll.items():
+        out[k] = v.tolist() if hasattr(v, "tolist") else v
+    return out
+
+
+class RollLog:
+    """
+    Log de rolagens com tamanho máximo (deque, mais recente primeiro).
+    Opcionalmente grava cada registro numa linha de data/logs/<sessão>.jsonl.
+    """
+
+    def __init__(self, maxlen: int = MAX_RECORDS, jsonl_path: Optional[Path] = None):
+        self._items: Deque[RollRecord] = deque(maxlen=max(1, int(maxlen)))
+        self.jsonl_path = jsonl_path
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def maxlen(self) -> int:
+        return self._items.maxlen or 0
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(
+        self,
+        icon: str,
+        label: str,
+        detail: str = "",
+        actor: str = "",
+        roll: Optional[Dict[str, Any]] = None,
+    ) -> RollRecord:
+        rec = RollRecord(
+            icon=icon,
+            label=label,
+            actor=actor,
+            detail=detail,
+            kind=(roll or {}).get("type", "info"),
+            total=(roll or {}).get("total"),
+            data=_jsonable(roll) if roll else {},
+        )
+        self.push(rec)
+        if self.jsonl_path is not None:
+            self._append_jsonl(rec)
+        return rec
+
+    def push(self, rec: RollRecord) -> None:
+        self._items.appendleft(rec)
+
+    def _append_jsonl(self, rec: RollRecord) -> None:
+        self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.jsonl_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(rec), ensure_ascii=False) + "\n")
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def page(self, i: int, size: int = PAGE_SIZE) -> List[RollRecord]:
+        start = max(0, int(i)) * size
+        return list(islice(self._items, start, start + size))
+
+    def pages(self, size: int = PAGE_SIZE) -> int:
+        return max(1, -(-len(self._items) // size))
+
+
+def new_session_path(name: str) -> Path:
+    return LOG_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{name}.jsonl"
+
+
+def session_log(state: MutableMapping, key: str = "log") -> RollLog:
+    """Busca (ou cria) o RollLog em st.session_state[key]; converte o log antigo (lista de linhas)."""
+    log = state.get(key)
+    if isinstance(log, RollLog):
+        return log
+    new = RollLog(jsonl_path=new_session_path(key) if os.environ.get("RPG_ROLL_LOG") == "1" else None)
+    if isinstance(log, list):
+        for line in reversed(log[:MAX_RECORDS]):
+            new.add("", str(line))
+    state[key] = new
+    return new
+
+
+def render_log(log: RollLog, key: str, page_size: int = PAGE_SIZE) -> None:
+    """Uma página do log num único st.markdown, com paginação e opção de gravar em JSONL."""
+    n_pages = log.pages(page_size)
+    c1, c2 = st.columns([0.5, 0.5])
+    page = c1.number_input("Página", 1, n_pages, value=1, step=1, key=f"{key}_page") if n_pages > 1 else 1
+    save = c2.toggle("Salvar em disco", value=log.jsonl_path is not None, key=f"{key}_jsonl",
+                     help="Grava cada rolagem em data/logs/*.jsonl")
+    if save and log.jsonl_path is None:
+        log.jsonl_path = new_session_path(key)
+    elif not save:
+        log.jsonl_path = None
+    if log.jsonl_path is not None:
+        st.caption(f"Gravando em `{log.jsonl_path.as_posix()}`")
+
+    st.caption(f"{len(log)} registro(s) • mostrando os mais recentes primeiro (máx. {log.maxlen})")
+    recs = log.page(int(page) - 1, page_size)
+    if recs:
+        st.markdown("  \n".join(r.markdown() for r in recs))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .dice import DiceError, compile_expr, roll_attacks_many
+from .dice_dist import expected_attack_damage
+from .models import Character, Monster
+from .rng import DiceRNG
+
+
+@dataclass(frozen=True)
+class SimUnit:
+    """Um combatente já "achatado" para a simulação (um ataque por turno)."""
+
+    name: str
+    side: int                  # 0 = grupo (PCs), 1 = monstros
+    hp: int
+    ac: int
+    init_bonus: int
+    to_hit: int = 0
+    damage: Optional[str] = None
+
+
+def _best_attack(options: Sequence[Tuple[int, str]], vs_ac: int) -> Tuple[int, Optional[str]]:
+    # escolhe o ataque de maior dano esperado contra a CA média do outro lado
+    best: Tuple[int, Optional[str]] = (0, None)
+    best_ev = -1.0
+    for to_hit, dmg in options:
+        try:
+            if not dmg or not compile_expr(dmg).terms:
+                continue
+        except DiceError:
+            continue  # fórmula inválida: fica fora da simulação
+        ev = expected_attack_damage(int(to_hit), dmg, int(vs_ac))["expected_damage"]
+        if ev > best_ev:
+            best, best_ev = (int(to_hit), dmg), ev
+    return best
+
+
+def units_from_party(party: Sequence[Character], vs_ac: int = 13, use_current_hp: bool = False) -> List[SimUnit]:
+    out = []
+    for ch in party:
+        to_hit, dmg = _best_attack([(w.attack_bonus, w.damage) for w in ch.weapons], vs_ac)
+        out.append(
+            SimUnit(
+                name=ch.character_name,
+                side=0,
+                hp=max(1, ch.current_hp if use_current_hp else ch.max_hp),
+                ac=ch.ac,
+                init_bonus=ch.initiative_bonus,
+                to_hit=to_hit,
+                damage=dmg,
+            )
+        )
+    return out
+
+
+def units_from_monsters(monsters: Sequence[Tuple[Monster, int]], vs_ac: int = 15) -> List[SimUnit]:
+    out = []
+    for m, count in monsters:
+        to_hit, dmg = _best_attack([(a.to_hit, a.damage) for a in m.actions if a.to_hit is not None], vs_ac)
+        for i in range(max(0, int(count))):
+            out.append(
+                SimUnit(
+                    name=f"{m.name} #{i + 1}" if count > 1 else m.name,
+                    side=1,
+                    hp=max(1, m.max_hp),
+                    ac=m.ac,
+                    init_bonus=(m.dex_score - 10) // 2,
+                    to_hit=to_hit,
+                    damage=dmg,
+                )
+            )
+    return out
+
+
+def _summary(x: np.ndarray) -> Dict[str, float]:
+    if x.size == 0:
+        return {"mean": 0.0, "std": 0.0, "p10": 0.0, "p50": 0.0, "p90": 0.0}
+    p10, p50, p90 = np.percentile(x, [10, 50, 90])
+    return {"mean": float(x.mean()), "std": float(x.std()), "p10": float(p10), "p50": float(p50), "p90": float(p90)}
+
+
+def simulate_units(
+    units: Sequence[SimUnit],
+    n: int = 10_000,
+    seed: Optional[int] = None,
+    max_rounds: int = 30,
+) -> Dict:
+    """
+    Joga N combates simplificados em paralelo (vetorizado por simulação):
+    iniciativa d20+bônus, cada um faz seu melhor ataque por turno num
+    inimigo de pé escolhido ao acaso, HP <= 0 = caído (sem testes de morte).
+    Regras de acerto/dano iguais às do ataque avulso (nat 1/nat 20/crit).
+    """
+    rng = DiceRNG(seed)
+    n = max(1, int(n))
+    U = len(units)
+    side = np.array([u.side for u in units], dtype=np.int64)
+    pcs = np.flatnonzero(side == 0)
+    mons = np.flatnonzero(side == 1)
+    if not pcs.size or not mons.size:
+        raise ValueError("A simulação precisa de pelo menos um PC e um monstro.")
+
+    ac = np.array([u.ac for u in units], dtype=np.int64)
+    hp = np.tile(np.array([u.hp for u in units], dtype=np.int64), (n, 1))
+    bonus = np.array([u.init_bonus for u in units], dtype=np.int64)
+
+    # ordem de iniciativa por simulação: d20+bônus, desempate pelo bônus e depois sorteio
+    init = rng.integers(21, size=(n, U)) + bonus
+    jitter = rng.integers(1_000_001, size=(n, U))
+    order = np.lexsort((-jitter, -np.broadcast_to(bonus, (n, U)), -init), axis=-1)
+
+    rounds = np.zeros(n, dtype=np.int64)
+    done = np.zeros(n, dtype=bool)
+    dmg_taken = np.zeros((n, U), dtype=np.int64)
+    rows = np.arange(n)
+
+    for rnd in range(1, max_rounds + 1):
+        active = ~done
+        if not active.any():
+            break
+        rounds[active] = rnd
+        for slot in range(U):
+            actor = order[:, slot]
+            for a, u in enumerate(units):
+                if not u.damage:
+                    continue
+                mask = ~done & (actor == a) & (hp[:, a] > 0)
+                if not mask.any():
+                    continue
+                idx = rows[mask]
+                enemies = mons if u.side == 0 else pcs
+                alive = hp[np.ix_(idx, enemies)] > 0
+                # alvo aleatório entre os inimigos de pé
+                pick = np.argmax(alive * rng.integers(1_000_001, size=alive.shape), axis=1)
+                target = enemies[pick]
+                res = roll_attacks_many(u.to_hit, u.damage, idx.size, ac=ac[target], rng=rng)
+                applied = np.minimum(np.maximum(res["damage"], 0), hp[idx, target])
+                hp[idx, target] -= applied
+                dmg_taken[idx, target] += applied
+            # fim de combate assim que um lado inteiro cai
+            done |= ~(hp[:, pcs] > 0).any(axis=1) | ~(hp[:, mons] > 0).any(axis=1)
+
+    party_alive = (hp[:, pcs] > 0).any(axis=1)
+    mons_alive = (hp[:, mons] > 0).any(axis=1)
+    win = party_alive & ~mons_alive
+    loss = ~party_alive
+    timeout = party_alive & mons_alive
+    downed = (hp[:, pcs] <= 0).sum(axis=1)
+
+    return {
+        "n": n,
+        "seed": rng.seed,
+        "win_rate": float(win.mean()),
+        "loss_rate": float(loss.mean()),
+        "timeout_rate": float(timeout.mean()),
+        "rounds": _summary(rounds[~timeout]),
+        "downed_pcs": _summary(downed),
+        "p_pc_down": {units[i].name: float((hp[:, i] <= 0).mean()) for i in pcs},
+        "party_damage_taken": _summary(dmg_taken[:, pcs].sum(axis=1)),
+        "monster_damage_taken": _summary(dmg_taken[:, mons].sum(axis=1)),
+        "rounds_hist": np.bincount(rounds, minlength=max_rounds + 1)[1:].tolist(),
+        "downed_hist": np.bincount(downed, minlength=pcs.size + 1).tolist(),
+    }
+
+
+def simulate_encounter(
+    party: Sequence[Character],
+    monsters: Sequence[Tuple[Monster, int]],
+    n: int = 10_000,
+    seed: Optional[int] = None,
+    max_rounds: int = 30,
+    use_current_hp: bool = False,
+) -> Dict:
+    """Grupo de fichas salvas vs. [(Monster, quantidade), ...]."""
+    pcs_ac = int(np.mean([c.ac for c in party])) if party else 13
+    mons_ac = int(np.mean([m.ac for m, _ in monsters])) if monsters else 13
+    units = units_from_party(party, mons_ac, use_current_hp) + units_from_monsters(monsters, pcs_ac)
+    return simulate_units(units, n=n, seed=seed, max_rounds=max_rounds)
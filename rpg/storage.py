@@ -1,81 +1,743 @@
 from __future__ import annotations
 
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type, TypeVar
 
-from .models import Character, Monster
+from pydantic import BaseModel
+
+from .models import Character, Encounter, Monster
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 CHAR_DIR = DATA_DIR / "characters"
 PORTRAIT_DIR = DATA_DIR / "portraits"
+THUMB_DIR = PORTRAIT_DIR / "thumbs"
+THUMB_SIZE = (320, 320)
 MONSTER_DIR = DATA_DIR / "monsters"
+ENCOUNTER_DIR = DATA_DIR / "encounters"
+SQLITE_PATH = DATA_DIR / "rpg.sqlite3"
+
+
+M = TypeVar("M", bound=BaseModel)
+
+log = logging.getLogger(__name__)
+
+
+class WriteBehindError(OSError):
+    """Gravações adiadas que falharam no flush (continuam na fila para nova tentativa)."""
+
+    def __init__(self, failures: List[Tuple[Path, BaseException]]):
+        self.failures = failures
+        names = ", ".join(f"{p.name} ({e})" for p, e in failures)
+        super().__init__(f"{len(failures)} gravação(ões) pendente(s) falharam: {names}")
+
+
+class _ModelCache(Generic[M]):
+    """
+    Cache de processo (compartilhado entre sessões do Streamlit):
+    path -> (mtime_ns, size, modelo já validado). Um rerun só re-lê
+    os arquivos que mudaram; quem chama recebe sempre uma cópia.
+    """
+
+    def __init__(self, model: Type[M]):
+        self.model = model
+        self._items: Dict[Path, Tuple[Tuple[int, int], M]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, path: Path) -> Optional[M]:
+        stamp = self._stamp(path)
+        if stamp is None:
+            self.drop(path)
+            return None
+        with self._lock:
+            hit = self._items.get(path)
+        if hit is None or hit[0] != stamp:
+            obj = self.model.model_validate_json(path.read_text(encoding="utf-8"))
+            with self._lock:
+                self._items[path] = (stamp, obj)
+            hit = (stamp, obj)
+        return hit[1].model_copy(deep=True)
+
+    def put(self, path: Path, obj: M) -> None:
+        stamp = self._stamp(path)
+        if stamp is None:
+            return
+        with self._lock:
+            self._items[path] = (stamp, obj.model_copy(deep=True))
+
+    def drop(self, path: Path) -> None:
+        with self._lock:
+            self._items.pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+# ====== resumos (roster / bestiário) ======
+
+
+def _character_summary(ch: Character) -> Dict[str, Any]:
+    return {
+        "id": ch.id,
+        "name": ch.character_name,
+        "class_and_level": ch.class_and_level,
+        "species": ch.species,
+        "level": ch.level,
+        "ac": ch.ac,
+        "max_hp": ch.max_hp,
+        "current_hp": ch.current_hp,
+        "has_portrait": bool(ch.portrait_b64 or ch.portrait_path),
+        "portrait": ch.portrait_path,
+        "thumb": _thumb_rel(ch.portrait_path),
+    }
+
+
+def _monster_summary(m: Monster) -> Dict[str, Any]:
+    return {
+        "id": m.id,
+        "name": m.name,
+        "cr": m.cr,
+        "ac": m.ac,
+        "max_hp": m.max_hp,
+        "current_hp": m.current_hp,
+    }
+
+
+def _encounter_summary(e: Encounter) -> Dict[str, Any]:
+    return {
+        "id": e.id,
+        "name": e.name,
+        "round": e.round,
+        "combatants": len(e.combatants),
+    }
+
+
+class Kind(NamedTuple):
+    model: Type[BaseModel]
+    summary: Callable[[Any], Dict[str, Any]]
+
+
+# tipo de entidade -> modelo + resumo (o nome também é a pasta no backend JSON)
+KINDS: Dict[str, Kind] = {
+    "characters": Kind(Character, _character_summary),
+    "monsters": Kind(Monster, _monster_summary),
+    "encounters": Kind(Encounter, _encounter_summary),
+}
+
+
+# ====== backends ======
+
+
+class StorageBackend:
+    """
+    Interface de armazenamento. As funções públicas deste módulo
+    (load_character, save_monster, ...) delegam para get_backend().
+    save/delete devolvem o resumo anterior (para liberar fotos órfãs).
+    """
+
+    name = ""
+
+    def list_ids(self, kind: str) -> List[str]:
+        raise NotImplementedError
+
+    def load(self, kind: str, obj_id: str) -> Optional[BaseModel]:
+        raise NotImplementedError
+
+    def save(self, kind: str, obj: BaseModel) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save_many(self, kind: str, objs: Iterable[BaseModel]) -> int:
+        n = 0
+        for obj in objs:
+            self.save(kind, obj)
+            n += 1
+        return n
+
+    def delete(self, kind: str, obj_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def summaries(self, kind: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def iter_all(self, kind: str) -> Iterator[BaseModel]:
+        for obj_id in self.list_ids(kind):
+            obj = self.load(kind, obj_id)
+            if obj is not None:
+                yield obj
+
+    def rebuild_index(self) -> Dict[str, int]:
+        return {k: len(self.list_ids(k)) for k in KINDS}
+
+    def clear_cache(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        """Grava no disco o que estiver pendente (no-op se o backend não adia escritas)."""
+
+
+class _WriteBehind:
+    """
+    Gravação adiada em thread de fundo: atualizações seguidas do mesmo
+    arquivo se juntam numa só, gravada no máximo `delay` segundos depois
+    da primeira (o atraso não cresce com novas edições). Gravação que
+    falha é logada e volta para a fila, com espera crescente.
+    """
+
+    MAX_RETRY_DELAY = 60.0
+
+    def __init__(self, delay: float, write: Callable[[Path, str], None]):
+        self.delay = float(delay)
+        self._write = write
+        self._pending: Dict[Path, Tuple[float, Callable[[], str], Optional[Callable[[], None]]]] = {}
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # garante a ordem das gravações do mesmo arquivo
+        self._thread: Optional[threading.Thread] = None
+        self._attempts: Dict[Path, int] = {}
+
+    def submit(self, path: Path, render: Callable[[], str], done: Optional[Callable[[], None]] = None) -> None:
+        with self._cond:
+            prev = self._pending.get(path)
+            deadline = prev[0] if prev else time.monotonic() + self.delay
+            self._pending[path] = (deadline, render, done)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rpg-storage-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _take(self, due_only: bool) -> List[Tuple[Path, Callable[[], str], Optional[Callable[[], None]]]]:
+        now = time.monotonic()
+        keys = [p for p, (d, _, _) in self._pending.items() if not due_only or d <= now]
+        return [(p, *self._pending.pop(p)[1:]) for p in keys]
+
+    def _write_items(self, items) -> List[Tuple[Path, BaseException]]:
+        failed: List[Tuple[Path, BaseException]] = []
+        for path, render, done in items:
+            try:
+                self._write(path, render())
+            except Exception as e:
+                # fica na fila (a não ser que já exista versão mais nova) e tenta de novo depois
+                n = self._attempts[path] = self._attempts.get(path, 0) + 1
+                retry = min(self.MAX_RETRY_DELAY, max(self.delay, 1.0) * 2 ** (n - 1))
+                log.error("falha ao gravar %s (tentativa %d, nova em %.0fs): %s", path, n, retry, e)
+                with self._cond:
+                    if path not in self._pending:
+                        self._pending[path] = (time.monotonic() + retry, render, done)
+                    self._cond.notify()
+                failed.append((path, e))
+                continue
+            self._attempts.pop(path, None)
+            if done:
+                done()
+        return failed
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                wait = min(d for d, _, _ in self._pending.values()) - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            with self._io_lock:
+                with self._cond:
+                    items = self._take(due_only=True)
+                self._write_items(items)
+
+    def flush(self) -> None:
+        """Grava tudo o que está pendente; WriteBehindError se algo falhar (segue na fila)."""
+        with self._io_lock:
+            with self._cond:
+                items = self._take(due_only=False)
+            failed = self._write_items(items)
+        if failed:
+            raise WriteBehindError(failed)
+
+
+class JsonDirBackend(StorageBackend):
+    """
+    Layout original: um JSON por entidade em <root>/<kind>/<id>.json,
+    com cache de processo por mtime e o índice <root>/index.json
+    (resumos para o roster, nunca abre as fichas completas).
+
+    Gravações são atômicas (temp + rename), puladas se o conteúdo não
+    mudou e, com flush_delay > 0, adiadas/coalescidas numa thread de
+    fundo; até lá, leituras vêm da versão em memória.
+    """
+
+    name = "json"
+
+    def __init__(self, root: Path = DATA_DIR, flush_delay: float = 0.0):
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self._caches: Dict[str, _ModelCache] = {k: _ModelCache(v.model) for k, v in KINDS.items()}
+        self._lock = threading.RLock()        # serializa save/delete/índice
+        self._mem_lock = threading.Lock()     # estado em memória (a thread de gravação só usa este)
+        self._index_mem: Optional[Tuple[Tuple[int, int], Dict[str, Dict[str, Dict[str, Any]]]]] = None
+        self._index_dirty = False
+        self._dirty: Dict[Path, BaseModel] = {}     # salvo na memória, ainda não no disco
+        self._digests: Dict[Path, str] = {}         # hash do último conteúdo gravado
+        self._writer = _WriteBehind(flush_delay, self._atomic_write) if flush_delay > 0 else None
+        if self._writer is not None:
+            atexit.register(self._flush_at_exit)
+
+    def _dir(self, kind: str) -> Path:
+        d = self.root / kind
+        d.mkdir(parents=True, exist_ok=True)
+        return d
+
+    def _path(self, kind: str, obj_id: str) -> Path:
+        return self._dir(kind) / f"{obj_id}.json"
+
+    def _atomic_write(self, path: Path, text: str) -> bool:
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        known = self._digests.get(path)
+        if known is None and path.exists():
+            try:
+                known = hashlib.sha1(path.read_bytes()).hexdigest()
+            except OSError:
+                known = None
+        if known == digest:
+            return False
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._digests[path] = digest
+        return True
+
+    def _persist(self, kind: str, path: Path, snap: BaseModel) -> None:
+        render = lambda: snap.model_dump_json(indent=2, ensure_ascii=False)  # noqa: E731
+
+        def done() -> None:
+            with self._mem_lock:
+                if self._dirty.get(path) is snap:
+                    del self._dirty[path]
+                self._caches[kind].put(path, snap)
+
+        if self._writer is None:
+            self._atomic_write(path, render())
+            done()
+        else:
+            self._writer.submit(path, render, done)
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+
+    def _flush_at_exit(self) -> None:
+        try:
+            self.flush()
+        except WriteBehindError as e:
+            log.critical("dados NÃO gravados ao encerrar: %s", e)
+
+    # ---- índice ----
+
+    def _write_index(self, idx: Dict[str, Dict[str, Dict[str, Any]]], sync: bool = False) -> None:
+        with self._mem_lock:
+            self._index_mem = (_ModelCache._stamp(self.index_path) or (0, 0), idx)
+            self._index_dirty = True
+        render = lambda: json.dumps(idx, ensure_ascii=False)  # noqa: E731
+
+        def done() -> None:
+            with self._mem_lock:
+                if self._index_mem is not None and self._index_mem[1] is idx:
+                    self._index_mem = (_ModelCache._stamp(self.index_path) or (0, 0), idx)
+                    self._index_dirty = False
+
+        if self._writer is None or sync:
+            self._atomic_write(self.index_path, render())
+            done()
+        else:
+            self._writer.submit(self.index_path, render, done)
+
+    def rebuild_index(self) -> Dict[str, int]:
+        """Reconstrói index.json a partir dos arquivos (corrige qualquer drift)."""
+        self.flush()
+        with self._lock:
+            idx: Dict[str, Dict[str, Dict[str, Any]]] = {k: {} for k in KINDS}
+            for kind, spec in KINDS.items():
+                for p in sorted(self._dir(kind).glob("*.json")):
+                    try:
+                        idx[kind][p.stem] = spec.summary(self._caches[kind].get(p))
+                    except Exception:
+                        continue
+            self._write_index(idx)
+        self.flush()
+        return {k: len(v) for k, v in idx.items()}
+
+    def _read_index(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        with self._mem_lock:
+            mem, dirty = self._index_mem, self._index_dirty
+        if mem is not None and dirty:
+            return mem[1]
+        stamp = _ModelCache._stamp(self.index_path)
+        if stamp is not None and mem is not None and mem[0] == stamp:
+            return mem[1]
+        if stamp is not None:
+            try:
+                idx = json.loads(self.index_path.read_text(encoding="utf-8"))
+                with self._mem_lock:
+                    self._index_mem = (stamp, idx)
+                return idx
+            except (OSError, ValueError):
+                pass
+        self.rebuild_index()
+        return self._index_mem[1]
+
+    def _index_set(self, kind: str, obj_id: str, row: Optional[Dict[str, Any]], sync: bool = False) -> Optional[Dict[str, Any]]:
+        # chamado com self._lock já adquirido, junto com a gravação/remoção da entidade
+        idx = {k: dict(v) for k, v in self._read_index().items()}
+        idx.setdefault(kind, {})
+        old = idx[kind].get(obj_id)
+        if row is None:
+            idx[kind].pop(obj_id, None)
+        else:
+            idx[kind][obj_id] = row
+        self._write_index(idx, sync=sync)
+        return old
+
+    # ---- entidades ----
+
+    def list_ids(self, kind: str) -> List[str]:
+        d = self._dir(kind)
+        ids = {p.stem for p in d.glob("*.json")}
+        with self._mem_lock:
+            ids.update(p.stem for p in self._dirty if p.parent == d)
+        return sorted(ids)
+
+    def load(self, kind: str, obj_id: str) -> Optional[BaseModel]:
+        path = self._path(kind, obj_id)
+        with self._mem_lock:
+            snap = self._dirty.get(path)
+        if snap is not None:
+            return snap.model_copy(deep=True)
+        return self._caches[kind].get(path)
+
+    def save(self, kind: str, obj: BaseModel) -> Optional[Dict[str, Any]]:
+        path = self._path(kind, obj.id)
+        snap = obj.model_copy(deep=True)
+        with self._lock:
+            with self._mem_lock:
+                self._dirty[path] = snap
+            old = self._index_set(kind, obj.id, KINDS[kind].summary(snap))
+            self._persist(kind, path, snap)
+        return old
+
+    def save_many(self, kind: str, objs: Iterable[BaseModel]) -> int:
+        # importação em lote: grava já (sem adiar) e o índice uma única vez
+        n = 0
+        self.flush()
+        with self._lock:
+            idx = {k: dict(v) for k, v in self._read_index().items()}
+            idx.setdefault(kind, {})
+            for obj in objs:
+                path = self._path(kind, obj.id)
+                with self._mem_lock:
+                    self._dirty.pop(path, None)
+                self._atomic_write(path, obj.model_dump_json(indent=2, ensure_ascii=False))
+                self._caches[kind].put(path, obj)
+                idx[kind][obj.id] = KINDS[kind].summary(obj)
+                n += 1
+            self._write_index(idx)
+        self.flush()
+        return n
+
+    def delete(self, kind: str, obj_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        path = self._path(kind, obj_id)
+        removed = False
+        self.flush()
+        with self._lock:
+            with self._mem_lock:
+                self._dirty.pop(path, None)
+            # índice primeiro e já no disco: nenhum leitor (nem após um crash) vê
+            # uma linha do roster apontando para um arquivo que não existe mais
+            old = self._index_set(kind, obj_id, None, sync=True)
+            self._caches[kind].drop(path)
+            self._digests.pop(path, None)
+            if path.exists():
+                path.unlink()
+                removed = True
+        return removed, old
+
+    def summaries(self, kind: str) -> List[Dict[str, Any]]:
+        rows = self._read_index().get(kind, {})
+        return [rows[k] for k in sorted(rows)]
+
+    def clear_cache(self) -> None:
+        self.flush()
+        for c in self._caches.values():
+            c.clear()
+        with self._mem_lock:
+            self._index_mem = None
+
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def make_backend(name: str, path: Optional[Path] = None) -> StorageBackend:
+    name = (name or "json").strip().lower()
+    if name == "sqlite":
+        from .storage_sqlite import SqliteBackend
+
+        return SqliteBackend(path or SQLITE_PATH)
+    if name == "json":
+        return JsonDirBackend(path or DATA_DIR, flush_delay=float(os.environ.get("RPG_FLUSH_DELAY", "0.5")))
+    raise ValueError(f"backend de armazenamento desconhecido: {name!r}")
+
+
+def get_backend() -> StorageBackend:
+    """
+    Backend do processo: RPG_STORAGE=json (padrão) ou sqlite (RPG_SQLITE_PATH opcional).
+    No JSON, RPG_FLUSH_DELAY (s, padrão 0.5; 0 = síncrono) controla a gravação adiada.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                sqlite_path = os.environ.get("RPG_SQLITE_PATH")
+                _backend = make_backend(
+                    os.environ.get("RPG_STORAGE", "json"),
+                    Path(sqlite_path) if sqlite_path else None,
+                )
+    return _backend
+
+
+def set_backend(backend: StorageBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+def copy_storage(src: StorageBackend, dst: StorageBackend) -> Dict[str, int]:
+    """Importa/exporta tudo de um backend para outro (uma transação por tipo no SQLite)."""
+    return {kind: dst.save_many(kind, src.iter_all(kind)) for kind in KINDS}
+
+
+def clear_cache() -> None:
+    get_backend().clear_cache()
+
+
+def flush() -> None:
+    get_backend().flush()
+
+
+def rebuild_index() -> Dict[str, int]:
+    ensure_dirs()
+    return get_backend().rebuild_index()
+
+
+def list_character_summaries() -> List[Dict[str, Any]]:
+    ensure_dirs()
+    return get_backend().summaries("characters")
+
+
+def list_monster_summaries() -> List[Dict[str, Any]]:
+    ensure_dirs()
+    return get_backend().summaries("monsters")
+
+
+# ====== fotos: blob store endereçado por conteúdo ======
+# data/portraits/<sha256>.<ext> + data/portraits/thumbs/<sha256>.jpg.
+# Character.portrait_path guarda o caminho relativo a data/ ("portraits/ab12….png").
+
+_IMAGE_MAGIC = [
+    (b"\x89PNG", ".png"),
+    (b"\xff\xd8", ".jpg"),
+    (b"GIF8", ".gif"),
+    (b"RIFF", ".webp"),
+]
+
+
+def _image_ext(data: bytes) -> str:
+    for magic, ext in _IMAGE_MAGIC:
+        if data.startswith(magic):
+            return ext
+    return ".bin"
+
+
+def _thumb_rel(portrait_rel: Optional[str]) -> Optional[str]:
+    if not portrait_rel:
+        return None
+    return f"portraits/thumbs/{Path(portrait_rel).stem}.jpg"
+
+
+def portrait_file(rel: Optional[str]) -> Optional[Path]:
+    if not rel:
+        return None
+    p = DATA_DIR / rel
+    return p if p.exists() else None
+
+
+def _make_thumb(src: Path, dst: Path) -> None:
+    try:
+        from PIL import Image  # vem junto com o streamlit
+    except Exception:  # pragma: no cover
+        return
+    try:
+        with Image.open(src) as im:
+            im.thumbnail(THUMB_SIZE)
+            tmp = dst.with_suffix(".tmp")
+            im.convert("RGB").save(tmp, "JPEG", quality=80, optimize=True)
+            os.replace(tmp, dst)
+    except Exception:
+        pass
+
+
+def put_portrait(data: bytes) -> str:
+    """Grava a imagem (se ainda não existir) e devolve o portrait_path relativo."""
+    ensure_dirs()
+    digest = hashlib.sha256(data).hexdigest()
+    rel = f"portraits/{digest}{_image_ext(data)}"
+    path = DATA_DIR / rel
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    thumb = DATA_DIR / _thumb_rel(rel)
+    if not thumb.exists():
+        _make_thumb(path, thumb)
+    return rel
+
+
+def portrait_thumb_file(rel: Optional[str]) -> Optional[Path]:
+    # miniatura do roster; se o Pillow não estiver disponível, usa a original
+    return portrait_file(_thumb_rel(rel)) or portrait_file(rel)
+
+
+def _release_portrait(rel: Optional[str]) -> bool:
+    # contagem de referências pelos resumos: só apaga se nenhuma ficha usa mais
+    if not rel:
+        return False
+    rows = get_backend().summaries("characters")
+    if any(r.get("portrait") == rel for r in rows):
+        return False
+    removed = False
+    for p in (DATA_DIR / rel, DATA_DIR / _thumb_rel(rel)):
+        try:
+            p.unlink()
+            removed = True
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def migrate_portraits() -> int:
+    """Move portrait_b64 legados para o blob store (uma vez). Retorna quantas fichas mudaram."""
+    moved = 0
+    for cid in list_character_ids():
+        ch = load_character(cid)
+        if not ch or not ch.portrait_b64:
+            continue
+        try:
+            data = base64.b64decode(ch.portrait_b64.encode("utf-8"))
+        except Exception:
+            continue
+        ch.portrait_path = put_portrait(data)
+        ch.portrait_b64 = None
+        save_character(ch)
+        moved += 1
+    return moved
 
 
 def ensure_dirs() -> None:
     CHAR_DIR.mkdir(parents=True, exist_ok=True)
     PORTRAIT_DIR.mkdir(parents=True, exist_ok=True)
+    THUMB_DIR.mkdir(parents=True, exist_ok=True)
     MONSTER_DIR.mkdir(parents=True, exist_ok=True)
+    ENCOUNTER_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def list_character_ids() -> List[str]:
     ensure_dirs()
-    return sorted([p.stem for p in CHAR_DIR.glob("*.json")])
+    return get_backend().list_ids("characters")
 
 
 def load_character(char_id: str) -> Optional[Character]:
     ensure_dirs()
-    path = CHAR_DIR / f"{char_id}.json"
-    if not path.exists():
-        return None
-    return Character.model_validate_json(path.read_text(encoding="utf-8"))
+    return get_backend().load("characters", char_id)
 
 
 def save_character(ch: Character) -> None:
     ensure_dirs()
-    path = CHAR_DIR / f"{ch.id}.json"
-    path.write_text(ch.model_dump_json(indent=2, ensure_ascii=False), encoding="utf-8")
+    old = get_backend().save("characters", ch)
+    if old and old.get("portrait") != ch.portrait_path:
+        _release_portrait(old.get("portrait"))
+
+
+def save_characters(chs: Iterable[Character]) -> int:
+    ensure_dirs()
+    return get_backend().save_many("characters", chs)
 
 
 def delete_character(char_id: str) -> bool:
     ensure_dirs()
-    removed = False
-    json_path = CHAR_DIR / f"{char_id}.json"
-    if json_path.exists():
-        json_path.unlink()
+    removed, old = get_backend().delete("characters", char_id)
+    if old and _release_portrait(old.get("portrait")):
         removed = True
-
-    for p in PORTRAIT_DIR.glob(f"{char_id}.*"):
-        try:
-            p.unlink()
-            removed = True
-        except Exception:
-            pass
     return removed
 
 
 def list_monster_ids() -> List[str]:
     ensure_dirs()
-    return sorted([p.stem for p in MONSTER_DIR.glob("*.json")])
+    return get_backend().list_ids("monsters")
 
 
 def load_monster(monster_id: str) -> Optional[Monster]:
     ensure_dirs()
-    path = MONSTER_DIR / f"{monster_id}.json"
-    if not path.exists():
-        return None
-    return Monster.model_validate_json(path.read_text(encoding="utf-8"))
+    return get_backend().load("monsters", monster_id)
 
 
 def save_monster(m: Monster) -> None:
     ensure_dirs()
-    path = MONSTER_DIR / f"{m.id}.json"
-    path.write_text(m.model_dump_json(indent=2, ensure_ascii=False), encoding="utf-8")
+    get_backend().save("monsters", m)
+
+
+def save_monsters(ms: Iterable[Monster]) -> int:
+    ensure_dirs()
+    return get_backend().save_many("monsters", ms)
 
 
 def delete_monster(monster_id: str) -> bool:
     ensure_dirs()
-    path = MONSTER_DIR / f"{monster_id}.json"
-    if path.exists():
-        path.unlink()
-        return True
-    return False
+    removed, _ = get_backend().delete("monsters", monster_id)
+    return removed
+
+
+def list_encounter_summaries() -> List[Dict[str, Any]]:
+    ensure_dirs()
+    return get_backend().summaries("encounters")
+
+
+def load_encounter(encounter_id: str) -> Optional[Encounter]:
+    ensure_dirs()
+    return get_backend().load("encounters", encounter_id)
+
+
+def save_encounter(e: Encounter) -> None:
+    ensure_dirs()
+    get_backend().save("encounters", e)
+
+
+def delete_encounter(encounter_id: str) -> bool:
+    ensure_dirs()
+    removed, _ = get_backend().delete("encounters", encounter_id)
+    return removed
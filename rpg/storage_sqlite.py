@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .storage import KINDS, StorageBackend
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    kind    TEXT NOT NULL,
+    id      TEXT NOT NULL,
+    name    TEXT NOT NULL DEFAULT '',
+    level   INTEGER,
+    cr      TEXT,
+    ac      INTEGER,
+    summary TEXT NOT NULL,
+    data    TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS ix_entities_name  ON entities (kind, name);
+CREATE INDEX IF NOT EXISTS ix_entities_level ON entities (kind, level);
+CREATE INDEX IF NOT EXISTS ix_entities_cr    ON entities (kind, cr);
+CREATE INDEX IF NOT EXISTS ix_entities_ac    ON entities (kind, ac);
+"""
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Um único arquivo SQLite (WAL): cada entidade é uma linha com o JSON do
+    modelo + colunas indexadas (nome, nível, CR, CA) e o resumo do roster.
+    Uma conexão por thread (o Streamlit roda cada sessão numa thread).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(kind: str, obj: BaseModel) -> Tuple[Any, ...]:
+        summary = KINDS[kind].summary(obj)
+        return (
+            kind,
+            obj.id,
+            summary.get("name") or "",
+            summary.get("level"),
+            summary.get("cr"),
+            summary.get("ac"),
+            json.dumps(summary, ensure_ascii=False),
+            obj.model_dump_json(),
+        )
+
+    def _old_summary(self, conn: sqlite3.Connection, kind: str, obj_id: str) -> Optional[Dict[str, Any]]:
+        cur = conn.execute("SELECT summary FROM entities WHERE kind = ? AND id = ?", (kind, obj_id))
+        r = cur.fetchone()
+        return json.loads(r[0]) if r else None
+
+    def list_ids(self, kind: str) -> List[str]:
+        cur = self._conn().execute("SELECT id FROM entities WHERE kind = ? ORDER BY id", (kind,))
+        return [r[0] for r in cur.fetchall()]
+
+    def load(self, kind: str, obj_id: str) -> Optional[BaseModel]:
+        cur = self._conn().execute("SELECT data FROM entities WHERE kind = ? AND id = ?", (kind, obj_id))
+        r = cur.fetchone()
+        return KINDS[kind].model.model_validate_json(r[0]) if r else None
+
+    def save(self, kind: str, obj: BaseModel) -> Optional[Dict[str, Any]]:
+        with self._conn() as conn:
+            old = self._old_summary(conn, kind, obj.id)
+            conn.execute("INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._row(kind, obj))
+        return old
+
+    def save_many(self, kind: str, objs: Iterable[BaseModel]) -> int:
+        rows = [self._row(kind, o) for o in objs]
+        with self._conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def delete(self, kind: str, obj_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        with self._conn() as conn:
+            old = self._old_summary(conn, kind, obj_id)
+            conn.execute("DELETE FROM entities WHERE kind = ? AND id = ?", (kind, obj_id))
+        return old is not None, old
+
+    def summaries(self, kind: str) -> List[Dict[str, Any]]:
+        cur = self._conn().execute("SELECT summary FROM entities WHERE kind = ? ORDER BY id", (kind,))
+        return [json.loads(r[0]) for r in cur.fetchall()]
+
+    def iter_all(self, kind: str) -> Iterator[BaseModel]:
+        model = KINDS[kind].model
+        cur = self._conn().execute("SELECT data FROM entities WHERE kind = ? ORDER BY id", (kind,))
+        for (data,) in cur:
+            yield model.model_validate_json(data)
+
+    def search(self, kind: str, name: str = "", cr: Optional[str] = None, min_level: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Consulta pelos campos indexados; devolve resumos."""
+        sql = "SELECT summary FROM entities WHERE kind = ?"
+        args: List[Any] = [kind]
+        if name:
+            sql += " AND name LIKE ?"
+            args.append(f"%{name}%")
+        if cr is not None:
+            sql += " AND cr = ?"
+            args.append(cr)
+        if min_level is not None:
+            sql += " AND level >= ?"
+            args.append(int(min_level))
+        cur = self._conn().execute(sql + " ORDER BY name", args)
+        return [json.loads(r[0]) for r in cur.fetchall()]
+
+    def rebuild_index(self) -> Dict[str, int]:
+        # recalcula resumo/colunas indexadas a partir do JSON guardado
+        counts = {}
+        for kind in KINDS:
+            counts[kind] = self.save_many(kind, list(self.iter_all(kind)))
+        return counts
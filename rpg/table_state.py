@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from dataclasses import asdict
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from . import storage
+from .models import Encounter
+from .roll_log import MAX_RECORDS, PAGE_SIZE, RollLog, RollRecord
+
+TABLE_DIR = storage.DATA_DIR / "table"
+
+
+# ====== onde o estado da mesa é guardado ======
+
+class TableStore:
+    """Persistência do hub: log da mesa (append-only) + metadados (versão, encontro aberto)."""
+
+    name = "memory"
+
+    def load_log(self, limit: int) -> List[Dict[str, Any]]:
+        return []
+
+    def append_log(self, rec: Dict[str, Any]) -> None:
+        pass
+
+    def clear_log(self) -> None:
+        pass
+
+    def get_meta(self) -> Dict[str, Any]:
+        return {}
+
+    def set_meta(self, meta: Dict[str, Any]) -> None:
+        pass
+
+    def stamp(self) -> Any:
+        """Marca barata que muda quando outro processo grava (None = não compartilha)."""
+        return None
+
+
+class FileStore(TableStore):
+    """data/table/log.jsonl (uma rolagem por linha) + data/table/meta.json (gravação atômica)."""
+
+    name = "file"
+
+    def __init__(self, root: Path, limit: int = MAX_RECORDS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.root / "log.jsonl"
+        self.meta_path = self.root / "meta.json"
+        self.limit = max(1, int(limit))
+        self._lines = 0  # linhas no arquivo (aproximado se outro processo também grava)
+
+    def _tail(self, limit: int) -> Tuple[deque, int]:
+        total = 0
+        tail: deque = deque(maxlen=limit)
+        if self.log_path.exists():
+            with self.log_path.open(encoding="utf-8") as f:
+                for line in f:
+                    tail.append(line)
+                    total += 1
+        return tail, total
+
+    def load_log(self, limit: int) -> List[Dict[str, Any]]:
+        self.limit = max(1, int(limit))
+        tail, total = self._tail(self.limit)
+        out = []
+        for line in tail:
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+        self._lines = total
+        if total > 2 * self.limit:
+            self._compact(tail)
+        return out
+
+    def _compact(self, tail: Optional[deque] = None) -> None:
+        # o arquivo não cresce para sempre: fica só com as últimas `limit` linhas
+        if tail is None:
+            tail, _ = self._tail(self.limit)
+        self._rewrite(tail)
+        self._lines = len(tail)
+
+    def _rewrite(self, lines) -> None:
+        tmp = self.log_path.with_name(f".{self.log_path.name}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp, self.log_path)
+
+    def append_log(self, rec: Dict[str, Any]) -> None:
+        with self.log_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._lines += 1
+        if self._lines > 2 * self.limit:
+            self._compact()
+
+    def clear_log(self) -> None:
+        self.log_path.unlink(missing_ok=True)
+        self._lines = 0
+
+    def get_meta(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def set_meta(self, meta: Dict[str, Any]) -> None:
+        tmp = self.meta_path.with_name(f".{self.meta_path.name}.tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+
+    def stamp(self) -> Any:
+        # meta.json muda com o encontro; o tamanho do log.jsonl, com as rolagens
+        out = []
+        for p in (self.meta_path, self.log_path):
+            try:
+                s = p.stat()
+                out.append((s.st_mtime_ns, s.st_size))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+
+class SqliteStore(TableStore):
+    """Tabelas table_log/table_meta (no mesmo arquivo do backend SQLite, por padrão)."""
+
+    name = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS table_log (
+        seq    INTEGER PRIMARY KEY AUTOINCREMENT,
+        record TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS table_meta (
+        key   TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, path: Path, limit: int = MAX_RECORDS):
+        self.path = Path(path)
+        self.limit = max(1, int(limit))
+        self._appends = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load_log(self, limit: int) -> List[Dict[str, Any]]:
+        self.limit = max(1, int(limit))
+        cur = self._conn().execute(
+            "SELECT record FROM (SELECT seq, record FROM table_log ORDER BY seq DESC LIMIT ?) ORDER BY seq",
+            (int(limit),),
+        )
+        return [json.loads(r[0]) for r in cur.fetchall()]
+
+    def append_log(self, rec: Dict[str, Any]) -> None:
+        with self._conn() as conn:
+            conn.execute("INSERT INTO table_log (record) VALUES (?)", (json.dumps(rec, ensure_ascii=False),))
+            self._appends += 1
+            if self._appends >= self.limit:
+                # de tempos em tempos apaga o que já não cabe no log da tela
+                self._appends = 0
+                conn.execute("DELETE FROM table_log WHERE seq <= (SELECT MAX(seq) FROM table_log) - ?", (self.limit,))
+
+    def clear_log(self) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM table_log")
+
+    def get_meta(self) -> Dict[str, Any]:
+        cur = self._conn().execute("SELECT key, value FROM table_meta")
+        return {k: json.loads(v) for k, v in cur.fetchall()}
+
+    def set_meta(self, meta: Dict[str, Any]) -> None:
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO table_meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in meta.items()],
+            )
+
+    def stamp(self) -> Any:
+        return self._conn().execute(
+            "SELECT (SELECT value FROM table_meta WHERE key = 'enc_version'), (SELECT MAX(seq) FROM table_log)"
+        ).fetchone()
+
+
+def make_store(name: str, path: Optional[Path] = None, limit: int = MAX_RECORDS) -> TableStore:
+    name = (name or "file").strip().lower()
+    if name == "memory":
+        return TableStore()
+    if name == "file":
+        return FileStore(path or TABLE_DIR, limit)
+    if name == "sqlite":
+        return SqliteStore(path or storage.SQLITE_PATH, limit)
+    raise ValueError(f"modo de estado da mesa desconhecido: {name!r}")
+
+
+# ====== hub ======
+
+class StaleEncounterError(RuntimeError):
+    """O encontro mudou (outra sessão/dispositivo) desde a versão em que a alteração se baseou."""
+
+
+class TableHub:
+    """
+    Estado compartilhado da mesa (um por processo): log de rolagens dos
+    jogadores e o encontro aberto. Toda alteração passa pelo lock; o log e
+    o encontro têm versões separadas (`log_version`, `enc_version`), e o que
+    é derivado de cada um (markdown do log, encontro carregado) fica em cache
+    pela sua versão, então N sessões abertas não refazem nada enquanto
+    ninguém mexe e uma rolagem não invalida o encontro.
+    """
+
+    def __init__(self, store: TableStore, maxlen: int = MAX_RECORDS):
+        self.store = store
+        self._lock = threading.RLock()
+        self.log = RollLog(maxlen=maxlen)
+        self.log_version = 0
+        self.enc_version = 0
+        self.encounter_id: Optional[str] = None
+        self._stamp: Any = None
+        self._enc_cache: Optional[Tuple[int, Encounter]] = None
+        self._md_cache: Dict[Tuple[int, int, int], str] = {}
+        self._reload()
+
+    @property
+    def version(self) -> int:
+        """Muda quando o log ou o encontro mudam."""
+        return self.log_version + self.enc_version
+
+    def _reload(self) -> None:
+        meta = self.store.get_meta()
+        enc_version = int(meta.get("enc_version", meta.get("version", 0)))
+        encounter_id = meta.get("encounter_id")
+        if enc_version != self.enc_version or encounter_id != self.encounter_id:
+            self.enc_version, self.encounter_id = enc_version, encounter_id
+            self._enc_cache = None
+        self.log.clear()
+        for rec in self.store.load_log(self.log.maxlen):
+            self.log.push(RollRecord(**rec))
+        self.log_version += 1
+        self._md_cache.clear()
+        self._stamp = self.store.stamp()
+
+    def _bump_log(self) -> None:
+        self.log_version += 1
+        self._md_cache.clear()
+        self._stamp = self.store.stamp()
+
+    def _bump_encounter(self) -> None:
+        self.enc_version += 1
+        self.store.set_meta({"enc_version": self.enc_version, "encounter_id": self.encounter_id})
+        self._stamp = self.store.stamp()
+
+    def refresh(self) -> int:
+        """Outro processo mexeu no arquivo/banco? Recarrega. Devolve a versão atual."""
+        with self._lock:
+            stamp = self.store.stamp()
+            if stamp is not None and stamp != self._stamp:
+                self._reload()
+            return self.version
+
+    # ---- log da mesa (mesma assinatura do RollLog) ----
+
+    def add(self, icon: str, label: str, detail: str = "", actor: str = "", roll: Optional[Dict[str, Any]] = None) -> RollRecord:
+        with self._lock:
+            rec = self.log.add(icon, label, detail, actor, roll)
+            self.store.append_log(asdict(rec))
+            self._bump_log()
+            return rec
+
+    def clear(self) -> None:
+        with self._lock:
+            self.log.clear()
+            self.store.clear_log()
+            self._bump_log()
+
+    def page_markdown(self, page: int, size: int = PAGE_SIZE) -> str:
+        with self._lock:
+            key = (self.log_version, int(page), int(size))
+            md = self._md_cache.get(key)
+            if md is None:
+                recs = islice(self.log, int(page) * size, (int(page) + 1) * size)
+                md = self._md_cache[key] = "  \n".join(r.markdown() for r in recs)
+            return md
+
+    # ---- encontro aberto ----
+
+    def set_encounter(self, encounter_id: Optional[str]) -> None:
+        with self._lock:
+            if encounter_id != self.encounter_id:
+                self.encounter_id = encounter_id
+                self._enc_cache = None
+                self._bump_encounter()
+
+    def load_encounter(self) -> Optional[Encounter]:
+        """Cópia do encontro aberto (cada sessão edita a sua e grava com save_encounter)."""
+        with self._lock:
+            if not self.encounter_id:
+                return None
+            if self._enc_cache is None or self._enc_cache[0] != self.enc_version:
+                enc = storage.load_encounter(self.encounter_id)
+                if enc is None:
+                    return None
+                self._enc_cache = (self.enc_version, enc)
+            return self._enc_cache[1].model_copy(deep=True)
+
+    def save_encounter(self, enc: Encounter, expected_version: Optional[int] = None) -> int:
+        """
+        Grava o encontro e devolve a nova enc_version. Com expected_version
+        (a versão em que a edição se baseou), é um compare-and-set: se outra
+        sessão gravou antes, levanta StaleEncounterError e nada é gravado.
+        """
+        with self._lock:
+            self.refresh()
+            if expected_version is not None and expected_version != self.enc_version:
+                raise StaleEncounterError(
+                    f"encontro alterado em outra sessão (v{expected_version} → v{self.enc_version})"
+                )
+            storage.save_encounter(enc)
+            self.encounter_id = enc.id
+            self._bump_encounter()
+            self._enc_cache = (self.enc_version, enc.model_copy(deep=True))
+            return self.enc_version
+
+
+_hub: Optional[TableHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_hub() -> TableHub:
+    """
+    Hub do processo. RPG_TABLE_STATE=file (padrão: data/table/), sqlite
+    (padrão quando RPG_STORAGE=sqlite) ou memory (não sobrevive a restart).
+    """
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                default = "sqlite" if os.environ.get("RPG_STORAGE", "json") == "sqlite" else "file"
+                sqlite_path = os.environ.get("RPG_SQLITE_PATH")
+                mode = os.environ.get("RPG_TABLE_STATE", default)
+                _hub = TableHub(make_store(mode, Path(sqlite_path) if sqlite_path and mode == "sqlite" else None))
+    return _hub
+
+
+def render_table_log(hub: TableHub, key: str, page_size: int = PAGE_SIZE) -> None:
+    """Log da mesa paginado; o markdown de cada página sai do cache por versão."""
+    # ciclo do fragmento sem rolagem nova: refresh é um stat e a página vem do cache
+    hub.refresh()
+    n_pages = max(1, -(-len(hub.log) // page_size))
+    page = st.number_input("Página", 1, n_pages, value=1, step=1, key=f"{key}_page") if n_pages > 1 else 1
+    st.caption(f"{len(hub.log)} registro(s) • mesa v{hub.version} ({hub.store.name})")
+    md = hub.page_markdown(int(page) - 1, page_size)
+    if md:
+        st.markdown(md)